@@ -0,0 +1,110 @@
+"""Micro-benchmarks of the framing codec against the per-call format path.
+
+`per-call` re-implements the previous `Protocol` methods, which looked up
+the format character and built the format string from
+`config.length_field_size` on every call. Reports ns per operation for
+packing, unpacking and splitting a stream of 5-byte responses.
+
+    python -m benchmarks.bench_codec
+"""
+
+import argparse
+import struct
+import timeit
+
+from src.config import config
+from src.protocol import FrameCodec, FrameParser
+
+SIZE_FORMATS = {2: "H", 4: "I", 8: "Q"}
+PAYLOAD = b"XXXXX"
+
+
+def per_call_pack_message(payload: bytes) -> bytes:
+    fmt_char = SIZE_FORMATS.get(config.length_field_size)
+    return struct.pack(f">{fmt_char}", len(payload)) + payload
+
+
+def per_call_unpack_length(length_bytes: bytes) -> int:
+    if len(length_bytes) != config.length_field_size:
+        raise ValueError("Invalid length prefix")
+    fmt_char = SIZE_FORMATS.get(config.length_field_size)
+    return struct.unpack(f">{fmt_char}", length_bytes)[0]
+
+
+def per_call_split(stream: bytes) -> int:
+    """Frame splitting with slicing and per-call unpacking"""
+    size = config.length_field_size
+    offset = count = 0
+    while offset < len(stream):
+        length = per_call_unpack_length(stream[offset : offset + size])
+        stream[offset + size : offset + size + length]
+        offset += size + length
+        count += 1
+    return count
+
+
+def ns_per_op(stmt, number: int, ops_per_call: int = 1) -> float:
+    best = min(timeit.repeat(stmt, number=number, repeat=5))
+    return best / (number * ops_per_call) * 1e9
+
+
+def main(args):
+    codec = FrameCodec(config.length_field_size)
+    batch = [PAYLOAD] * args.batch
+    length_bytes = codec.pack_length(len(PAYLOAD))
+    stream = codec.pack_many(batch)
+    buffer = bytearray(len(stream))
+
+    def pack_into_batch():
+        offset = 0
+        for payload in batch:
+            offset = codec.pack_into(buffer, offset, payload)
+
+    def parse_batch():
+        for _ in FrameParser(codec).feed(stream):
+            pass
+
+    n = args.number
+    rows = [
+        (
+            "pack_message",
+            ns_per_op(lambda: per_call_pack_message(PAYLOAD), n),
+            ns_per_op(lambda: codec.pack_message(PAYLOAD), n),
+        ),
+        (
+            "unpack_length",
+            ns_per_op(lambda: per_call_unpack_length(length_bytes), n),
+            ns_per_op(lambda: codec.unpack_length(length_bytes), n),
+        ),
+        (
+            f"pack x{args.batch} (join)",
+            ns_per_op(
+                lambda: b"".join(per_call_pack_message(p) for p in batch),
+                n // args.batch,
+                args.batch,
+            ),
+            ns_per_op(lambda: codec.pack_many(batch), n // args.batch, args.batch),
+        ),
+        (
+            f"pack_into x{args.batch}",
+            None,
+            ns_per_op(pack_into_batch, n // args.batch, args.batch),
+        ),
+        (
+            f"split x{args.batch}",
+            ns_per_op(lambda: per_call_split(stream), n // args.batch, args.batch),
+            ns_per_op(parse_batch, n // args.batch, args.batch),
+        ),
+    ]
+
+    print(f"{'operation':<20} {'per-call':>10} {'codec':>10}   (ns/frame)")
+    for name, before, after in rows:
+        before = f"{before:>10.0f}" if before is not None else f"{'-':>10}"
+        print(f"{name:<20} {before} {after:>10.0f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--number", type=int, default=200_000)
+    parser.add_argument("--batch", type=int, default=64)
+    main(parser.parse_args())
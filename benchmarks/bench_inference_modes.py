@@ -0,0 +1,156 @@
+"""Event loop responsiveness under a CPU-heavy model, per inference mode.
+
+Runs the TCP server and the HTTP metrics server on one loop (as main.py
+does), drives TCP clients against a model that burns CPU in pure Python,
+and polls GET /metrics at the same time. Reports p50/p99 latency of both.
+
+    python -m benchmarks.bench_inference_modes
+"""
+
+import argparse
+import asyncio
+import os
+import time
+
+import uvicorn
+
+from src.config import config
+from src.http_server import app
+from src.inference import InferenceExecutor
+from src.metrics_v2 import metrics
+from src.ml_interface_abstract import ML_Interface_Abstract
+from src.protocol import FrameCodec
+from src.tcp_server import TCP_Server
+
+HOST = "127.0.0.1"
+TCP_PORT = 9100
+HTTP_PORT = 9180
+CODEC = FrameCodec(config.length_field_size)
+
+
+class CPUHeavyMLInterface(ML_Interface_Abstract):
+    """Sync-only model that spends `iterations` of pure Python per request"""
+
+    def __init__(self, iterations: int):
+        self.iterations = iterations
+
+    def run_inference(self, payload: bytes) -> bytes:
+        acc = 0
+        for i in range(self.iterations):
+            acc = (acc + i * i) % 1_000_003
+        return acc.to_bytes(5, "big")
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def tcp_client(deadline: float, latencies: list[float]):
+    reader, writer = await asyncio.open_connection(HOST, TCP_PORT)
+    payload = CODEC.pack_message(os.urandom(128))
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        writer.write(payload)
+        await writer.drain()
+        length_bytes = await reader.readexactly(config.length_field_size)
+        await reader.readexactly(CODEC.unpack_length(length_bytes))
+        latencies.append(time.perf_counter() - started)
+    writer.close()
+
+
+async def http_poller(deadline: float, latencies: list[float], interval: float):
+    request = f"GET /metrics HTTP/1.1\r\nHost: {HOST}\r\nConnection: close\r\n\r\n"
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        reader, writer = await asyncio.open_connection(HOST, HTTP_PORT)
+        writer.write(request.encode())
+        await writer.drain()
+        await reader.read()
+        writer.close()
+        latencies.append(time.perf_counter() - started)
+        await asyncio.sleep(interval)
+
+
+async def run_mode(mode: str, args) -> dict:
+    ml_interface = CPUHeavyMLInterface(args.iterations)
+    executor = InferenceExecutor(ml_interface, mode=mode, workers=args.workers)
+    server = TCP_Server(
+        host=HOST,
+        port=TCP_PORT,
+        length_field_size=config.length_field_size,
+        response_size=config.response_size,
+        max_connections=config.max_connections,
+        max_payload_size=config.max_payload_size_kb * 1024,
+        payload_timeout_seconds=config.payload_timeout_seconds,
+        protocol=CODEC,
+        ml_interface=ml_interface,
+        metrics=metrics,
+        executor=executor,
+    )
+    http_server = uvicorn.Server(
+        uvicorn.Config(
+            app, host=HOST, port=HTTP_PORT, loop="asyncio", log_level="error"
+        )
+    )
+
+    await server.startup()
+    http_task = asyncio.create_task(http_server.serve())
+    while not http_server.started:
+        await asyncio.sleep(0.01)
+
+    # Spawn pool workers before measuring
+    await asyncio.gather(*(executor.run(b"") for _ in range(args.workers)))
+
+    tcp_latencies: list[float] = []
+    http_latencies: list[float] = []
+    deadline = time.perf_counter() + args.duration
+    try:
+        await asyncio.gather(
+            http_poller(deadline, http_latencies, args.poll_interval),
+            *(tcp_client(deadline, tcp_latencies) for _ in range(args.clients)),
+        )
+    finally:
+        http_server.should_exit = True
+        await http_task
+        await server.shutdown()
+
+    return {
+        "mode": mode,
+        "tcp_requests": len(tcp_latencies),
+        "tcp_p50_ms": percentile(tcp_latencies, 50) * 1000,
+        "tcp_p99_ms": percentile(tcp_latencies, 99) * 1000,
+        "http_p50_ms": percentile(http_latencies, 50) * 1000,
+        "http_p99_ms": percentile(http_latencies, 99) * 1000,
+    }
+
+
+async def main(args):
+    await metrics.start()
+    try:
+        results = [await run_mode(mode, args) for mode in args.modes]
+    finally:
+        await metrics.stop()
+
+    print(
+        f"{'mode':<8} {'requests':>9} {'tcp p50':>9} {'tcp p99':>9} "
+        f"{'http p50':>9} {'http p99':>9}   (ms)"
+    )
+    for r in results:
+        print(
+            f"{r['mode']:<8} {r['tcp_requests']:>9} {r['tcp_p50_ms']:>9.2f} "
+            f"{r['tcp_p99_ms']:>9.2f} {r['http_p50_ms']:>9.2f} {r['http_p99_ms']:>9.2f}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--modes", nargs="+", default=["inline", "thread", "process"])
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--iterations", type=int, default=200_000)
+    parser.add_argument("--poll-interval", type=float, default=0.05)
+    asyncio.run(main(parser.parse_args()))
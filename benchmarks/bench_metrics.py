@@ -0,0 +1,104 @@
+"""Per-event cost of the counter metrics backend vs the event-queue backend.
+
+Records the per-request metric calls of a successful request
+(`add_request`) and reports time per event, allocations per event and,
+for a burst larger than the queue, how many events were lost.
+
+    python -m benchmarks.bench_metrics
+"""
+
+import argparse
+import asyncio
+import time
+import tracemalloc
+
+from src.metrics_v2 import Metrics, QueuedMetrics
+
+QUEUE_CAPACITY = 10000
+
+
+async def record(metrics: Metrics, events: int) -> float:
+    """Seconds to record and apply `events` requests"""
+    started = time.perf_counter()
+    remaining = events
+    while remaining:
+        chunk = min(remaining, QUEUE_CAPACITY)
+        for _ in range(chunk):
+            metrics.add_request()
+        remaining -= chunk
+        if isinstance(metrics, QueuedMetrics):
+            # Let the consumer drain before the queue overflows
+            while not metrics.event_queue.empty():
+                await asyncio.sleep(0)
+    # Include the time until the event is visible in get_metrics()
+    while (await metrics.get_metrics())["total_requests"] < events:
+        await asyncio.sleep(0)
+    return time.perf_counter() - started
+
+
+async def allocations_per_event(metrics: Metrics, events: int) -> float:
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    for _ in range(events):
+        metrics.add_request()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    stats = after.compare_to(before, "filename")
+    return sum(max(stat.count_diff, 0) for stat in stats) / events
+
+
+async def lost_in_burst(metrics: Metrics, events: int) -> int:
+    for _ in range(events):
+        metrics.add_request()
+    await asyncio.sleep(0.5)
+    return events - (await metrics.get_metrics())["total_requests"]
+
+
+async def bench(name: str, factory, args) -> dict:
+    metrics = factory()
+    await metrics.start()
+    try:
+        elapsed = await record(metrics, args.events)
+    finally:
+        await metrics.stop()
+
+    metrics = factory()
+    allocations = await allocations_per_event(metrics, min(args.events, QUEUE_CAPACITY))
+
+    metrics = factory()
+    await metrics.start()
+    try:
+        lost = await lost_in_burst(metrics, args.burst)
+    finally:
+        await metrics.stop()
+
+    return {
+        "name": name,
+        "ns_per_event": elapsed / args.events * 1e9,
+        "allocations": allocations,
+        "lost": lost,
+    }
+
+
+async def main(args):
+    results = [
+        await bench("counters", Metrics, args),
+        await bench(
+            "queue", lambda: QueuedMetrics(batch_size=100, flush_interval=0.01), args
+        ),
+    ]
+    print(
+        f"{'backend':<10} {'ns/event':>10} {'allocs/event':>13} {'lost in burst':>14}"
+    )
+    for r in results:
+        print(
+            f"{r['name']:<10} {r['ns_per_event']:>10.0f} {r['allocations']:>13.2f} "
+            f"{r['lost']:>14}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, default=200_000)
+    parser.add_argument("--burst", type=int, default=50_000)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,94 @@
+"""Request throughput of the stream and buffered TCP transports.
+
+Starts the server with a trivial model for each transport in turn and
+drives it with closed-loop clients for a fixed duration.
+
+    python -m benchmarks.bench_transport
+"""
+
+import argparse
+import asyncio
+import os
+import time
+
+from src.config import config
+from src.metrics_v2 import Metrics
+from src.ml_interface_abstract import ML_Interface_Abstract
+from src.protocol import FrameCodec
+from src.tcp_server import TCP_Server
+
+HOST = "127.0.0.1"
+PORT = 9100
+CODEC = FrameCodec(config.length_field_size)
+
+
+class ConstantMLInterface(ML_Interface_Abstract):
+    def run_inference(self, payload: bytes) -> bytes:
+        return b"XXXXX"
+
+    async def async_run_inference(self, payload: bytes) -> bytes:
+        return b"XXXXX"
+
+
+async def client(deadline: float, payload_size: int) -> int:
+    reader, writer = await asyncio.open_connection(HOST, PORT)
+    frame = CODEC.pack_message(os.urandom(payload_size))
+    count = 0
+    while time.perf_counter() < deadline:
+        writer.write(frame)
+        await writer.drain()
+        length_bytes = await reader.readexactly(config.length_field_size)
+        await reader.readexactly(CODEC.unpack_length(length_bytes))
+        count += 1
+    writer.close()
+    return count
+
+
+async def run(transport: str, payload_size: int, args) -> float:
+    server = TCP_Server(
+        host=HOST,
+        port=PORT,
+        length_field_size=config.length_field_size,
+        response_size=config.response_size,
+        max_connections=args.clients,
+        max_payload_size=config.max_payload_size_kb * 1024,
+        payload_timeout_seconds=config.payload_timeout_seconds,
+        protocol=CODEC,
+        ml_interface=ConstantMLInterface(),
+        metrics=Metrics(),
+        transport=transport,
+    )
+    await server.startup()
+    try:
+        started = time.perf_counter()
+        counts = await asyncio.gather(
+            *(
+                client(started + args.duration, payload_size)
+                for _ in range(args.clients)
+            )
+        )
+        elapsed = time.perf_counter() - started
+    finally:
+        await server.shutdown()
+    return sum(counts) / elapsed
+
+
+async def main(args):
+    print(f"{'payload':>9} {'stream':>12} {'buffered':>12} {'change':>8}   (req/s)")
+    for payload_size in args.payload_sizes:
+        stream = await run("stream", payload_size, args)
+        buffered = await run("buffered", payload_size, args)
+        print(
+            f"{payload_size:>9} {stream:>12.0f} {buffered:>12.0f} "
+            f"{(buffered / stream - 1) * 100:>+7.1f}%"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=3.0)
+    parser.add_argument(
+        "--payload-sizes", type=int, nargs="+", default=[128, 16 * 1024, 256 * 1024]
+    )
+    asyncio.run(main(parser.parse_args()))
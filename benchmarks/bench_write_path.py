@@ -0,0 +1,120 @@
+"""Send syscalls and throughput of the response path for 5-byte responses.
+
+Runs pipelined protocol version 2 clients against the server with write
+coalescing off and on, counting the `send`/`sendmsg` calls made on the
+server's sockets.
+
+    python -m benchmarks.bench_write_path
+"""
+
+import argparse
+import asyncio
+import time
+
+from src.config import config
+from src.metrics_v2 import Metrics
+from src.ml_interface_abstract import ML_Interface_Abstract
+from src.protocol import PROTOCOL_V2, FrameCodec
+from src.tcp_server import TCP_Server
+
+HOST = "127.0.0.1"
+PORT = 9100
+CODEC = FrameCodec(config.length_field_size)
+
+
+class ConstantMLInterface(ML_Interface_Abstract):
+    def run_inference(self, payload: bytes) -> bytes:
+        return b"XXXXX"
+
+    async def async_run_inference(self, payload: bytes) -> bytes:
+        return b"XXXXX"
+
+
+class CountingSocket:
+    """Socket proxy counting the send calls made by an asyncio transport"""
+
+    def __init__(self, sock, counter: list[int]):
+        self._sock = sock
+        self._counter = counter
+
+    def send(self, data):
+        self._counter[0] += 1
+        return self._sock.send(data)
+
+    def sendmsg(self, buffers, *args):
+        self._counter[0] += 1
+        return self._sock.sendmsg(buffers, *args)
+
+    def __getattr__(self, name):
+        return getattr(self._sock, name)
+
+
+class CountingServer(TCP_Server):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.sends = [0]
+
+    def _response_writer(self, writer):
+        transport = writer.transport
+        transport._sock = CountingSocket(transport._sock, self.sends)
+        return super()._response_writer(writer)
+
+
+async def client(deadline: float, window: int) -> int:
+    reader, writer = await asyncio.open_connection(HOST, PORT)
+    header_size = CODEC.header_size(PROTOCOL_V2)
+    frames = b"".join(CODEC.pack_frame(i, b"data") for i in range(window))
+    count = 0
+    while time.perf_counter() < deadline:
+        writer.write(frames)
+        await writer.drain()
+        for _ in range(window):
+            header = CODEC.unpack_header(await reader.readexactly(header_size))
+            await reader.readexactly(header.length)
+        count += window
+    writer.close()
+    return count
+
+
+async def run(coalescing: bool, args) -> tuple[float, float]:
+    server = CountingServer(
+        host=HOST,
+        port=PORT,
+        length_field_size=config.length_field_size,
+        response_size=config.response_size,
+        max_connections=args.clients,
+        max_payload_size=config.max_payload_size_kb * 1024,
+        payload_timeout_seconds=config.payload_timeout_seconds,
+        protocol=CODEC,
+        ml_interface=ConstantMLInterface(),
+        metrics=Metrics(),
+        protocol_version=PROTOCOL_V2,
+        max_in_flight=args.window,
+        write_coalescing=coalescing,
+    )
+    await server.startup()
+    try:
+        started = time.perf_counter()
+        counts = await asyncio.gather(
+            *(client(started + args.duration, args.window) for _ in range(args.clients))
+        )
+        elapsed = time.perf_counter() - started
+    finally:
+        await server.shutdown()
+    responses = sum(counts)
+    return responses / elapsed, server.sends[0] / responses
+
+
+async def main(args):
+    print(f"{'coalescing':>10} {'req/s':>12} {'sends/resp':>11}")
+    for coalescing in (False, True):
+        throughput, sends = await run(coalescing, args)
+        print(f"{str(coalescing):>10} {throughput:>12.0f} {sends:>11.3f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--window", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=3.0)
+    asyncio.run(main(parser.parse_args()))
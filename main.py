@@ -1,3 +1,4 @@
+import argparse
 import asyncio
 import logging
 
@@ -5,6 +6,7 @@ from src.config import config
 from src.core import setup_http_server, setup_tcp_server
 from src.logging import setup_logging
 from src.metrics_v2 import metrics
+from src.supervisor import Supervisor
 
 
 async def main():
@@ -29,5 +31,36 @@ async def main():
         await metrics.stop()
 
 
+async def main_workers(workers: int):
+    """Supervisor mode: TCP is served by worker processes, HTTP from here"""
+    setup_logging(config.log_level)
+    logger = logging.getLogger(__name__)
+
+    supervisor = Supervisor(workers)
+    http_server = setup_http_server(supervisor.metrics)
+
+    supervisor.start()
+    monitor_task = asyncio.create_task(supervisor.monitor())
+    try:
+        await http_server.serve()
+    except asyncio.CancelledError:
+        logger.info("Server stopped")
+    finally:
+        monitor_task.cancel()
+        supervisor.stop()
+
+
 if __name__ == "__main__":
-    asyncio.run(main())
+    parser = argparse.ArgumentParser(description="ML TCP Server")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Number of worker processes sharing the TCP port (SO_REUSEPORT)",
+    )
+    args = parser.parse_args()
+
+    if args.workers > 1:
+        asyncio.run(main_workers(args.workers))
+    else:
+        asyncio.run(main())
@@ -0,0 +1,90 @@
+import logging
+import time
+
+from src.metrics_v2 import Metrics
+
+logger = logging.getLogger(__name__)
+
+
+class Overloaded(Exception):
+    """Raised for requests shed by admission control"""
+
+
+class AdaptiveConcurrencyLimit:
+    """AIMD limit on concurrent inference requests.
+
+    A request is admitted while fewer than `limit` are in flight and shed
+    otherwise, without queueing. Each completion adjusts the limit from its
+    latency: above `target_latency_ms` the limit is cut by `backoff` (at
+    most once per cohort of requests started before the previous cut),
+    below it the limit grows by one per `limit` completions as long as it
+    is actually being used.
+    """
+
+    def __init__(
+        self,
+        metrics: Metrics,
+        target_latency_ms: float,
+        max_limit: int,
+        initial_limit: int = 32,
+        min_limit: int = 1,
+        backoff: float = 0.9,
+    ):
+        self.metrics = metrics
+        self.target_ns = target_latency_ms * 1_000_000
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.backoff = backoff
+        self.limit = float(min(max(initial_limit, min_limit), max_limit))
+        self.in_flight = 0
+        self.last_decrease_ns = 0
+        self.metrics.set_admission_limit(int(self.limit))
+
+    def try_acquire(self) -> bool:
+        if self.in_flight >= int(self.limit):
+            self.metrics.add_shed_request()
+            return False
+        self.in_flight += 1
+        self.metrics.set_inference_queue_depth(self.in_flight)
+        return True
+
+    def release(self, started_ns: int, ended_ns: int):
+        saturated = self.in_flight >= int(self.limit)
+        self.in_flight -= 1
+        self.metrics.set_inference_queue_depth(self.in_flight)
+
+        if ended_ns - started_ns > self.target_ns:
+            if started_ns >= self.last_decrease_ns:
+                self.limit = max(self.min_limit, self.limit * self.backoff)
+                self.last_decrease_ns = ended_ns
+        elif saturated:
+            self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+        self.metrics.set_admission_limit(int(self.limit))
+
+
+class AcceptThrottle:
+    """Token-bucket limit on new connections once the server is nearly full.
+
+    Below `threshold` active connections every connection is accepted;
+    from there on, at most `rate_per_second` (with a burst of the same
+    size) until the count drops again.
+    """
+
+    def __init__(self, metrics: Metrics, threshold: int, rate_per_second: float):
+        self.metrics = metrics
+        self.threshold = threshold
+        self.rate = rate_per_second
+        self.tokens = rate_per_second
+        self.updated = time.monotonic()
+
+    def try_acquire(self, active_connections: int) -> bool:
+        now = time.monotonic()
+        self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if active_connections < self.threshold:
+            return True
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        self.metrics.add_rejected_connection()
+        return False
@@ -0,0 +1,156 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Optional, Set
+
+from src.inference import InferenceExecutor
+from src.metrics_v2 import Metrics
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class BatchItem:
+    payload: bytes
+    future: asyncio.Future
+    enqueued_at: float
+
+
+class BatchScheduler:
+    """Cross-connection micro-batching in front of the ML interface.
+
+    Every connection submits its payload to one shared queue and awaits a
+    future. The scheduler flushes a batch as soon as `max_batch_size` items
+    are queued or the oldest item has waited `max_wait_us`, runs it through
+    `run_batch_inference` and resolves each future, so the result goes back
+    to the connection (and `StreamWriter`) that submitted it.
+
+    Up to one batch per executor worker runs at a time; while they are
+    busy, new frames keep accumulating into the next batch.
+    """
+
+    def __init__(
+        self,
+        executor: InferenceExecutor,
+        metrics: Metrics,
+        max_batch_size: int,
+        max_wait_us: int,
+    ):
+        self.executor = executor
+        self.metrics = metrics
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_us / 1_000_000
+
+        self.queue: asyncio.Queue[BatchItem] = asyncio.Queue()
+        self.batch_slots = asyncio.Semaphore(executor.workers)
+        self.batch_tasks: Set[asyncio.Task] = set()
+        self.scheduler_task: Optional[asyncio.Task] = None
+        self.running = False
+
+    async def start(self):
+        """Start the batch scheduler"""
+        self.running = True
+        self.scheduler_task = asyncio.create_task(self._scheduler_loop())
+        logger.info(
+            "Batch scheduler started (max size: %d, max wait: %.0fus)",
+            self.max_batch_size,
+            self.max_wait * 1_000_000,
+        )
+
+    async def stop(self):
+        """Stop the scheduler and fail anything still queued"""
+        self.running = False
+        if self.scheduler_task:
+            self.scheduler_task.cancel()
+            try:
+                await self.scheduler_task
+            except asyncio.CancelledError:
+                pass
+
+        for task in self.batch_tasks.copy():
+            task.cancel()
+        await asyncio.gather(*self.batch_tasks, return_exceptions=True)
+
+        while not self.queue.empty():
+            item = self.queue.get_nowait()
+            if not item.future.done():
+                item.future.cancel()
+        logger.info("Batch scheduler stopped")
+
+    async def submit(self, payload: bytes) -> bytes:
+        """Queue a payload for the next batch and wait for its response"""
+        future = asyncio.get_running_loop().create_future()
+        self.queue.put_nowait(BatchItem(payload, future, time.perf_counter()))
+        return await future
+
+    async def _scheduler_loop(self):
+        loop = asyncio.get_running_loop()
+
+        while self.running:
+            try:
+                batch = [await self.queue.get()]
+                deadline = loop.time() + self.max_wait
+
+                while len(batch) < self.max_batch_size:
+                    if not self.queue.empty():
+                        batch.append(self.queue.get_nowait())
+                        continue
+
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        batch.append(
+                            await asyncio.wait_for(self.queue.get(), timeout=timeout)
+                        )
+                    except asyncio.TimeoutError:
+                        break
+
+                await self.batch_slots.acquire()
+                task = asyncio.create_task(self._run_batch(batch))
+                self.batch_tasks.add(task)
+                task.add_done_callback(self._batch_done)
+
+            except asyncio.CancelledError:
+                logger.info("Batch scheduler loop cancelled")
+                break
+            except Exception as e:
+                logger.error("Batch scheduler error: %s", e)
+
+    def _batch_done(self, task: asyncio.Task):
+        self.batch_tasks.discard(task)
+        self.batch_slots.release()
+
+    async def _run_batch(self, batch: list[BatchItem]):
+        # Clients that went away while queued have cancelled futures
+        batch = [item for item in batch if not item.future.done()]
+        if not batch:
+            return
+
+        flushed_at = time.perf_counter()
+        self.metrics.add_batch(
+            len(batch),
+            [(flushed_at - item.enqueued_at) * 1_000_000 for item in batch],
+        )
+
+        try:
+            responses = await self.executor.run_batch([item.payload for item in batch])
+            if len(responses) != len(batch):
+                raise ValueError(
+                    f"Batch inference returned {len(responses)} responses "
+                    f"for {len(batch)} payloads"
+                )
+        except asyncio.CancelledError:
+            for item in batch:
+                item.future.cancel()
+            raise
+        except Exception as e:
+            for item in batch:
+                if not item.future.done():
+                    item.future.set_exception(e)
+            return
+
+        for item, response in zip(batch, responses):
+            if not item.future.done():
+                item.future.set_result(response)
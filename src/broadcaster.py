@@ -0,0 +1,121 @@
+import asyncio
+import json
+import logging
+from typing import Optional, Set
+
+logger = logging.getLogger(__name__)
+
+
+def diff(previous: dict, current: dict) -> dict:
+    """Fields of `current` that differ from `previous`, recursing into dicts.
+
+    Merging the result into `previous` (recursively) gives `current`; lists
+    and other values are sent whole when they change.
+    """
+    delta = {}
+    for key, value in current.items():
+        old = previous.get(key)
+        if isinstance(value, dict) and isinstance(old, dict):
+            nested = diff(old, value)
+            if nested:
+                delta[key] = nested
+        elif value != old or key not in previous:
+            delta[key] = value
+    return delta
+
+
+class Subscriber:
+    """One WebSocket client of a `MetricsBroadcaster`.
+
+    Frames are queued as already-serialized text. `None` is queued once the
+    subscriber has been dropped for falling behind.
+    """
+
+    def __init__(self, delta: bool, max_pending: int):
+        self.delta = delta
+        self.queue: asyncio.Queue[Optional[str]] = asyncio.Queue(maxsize=max_pending)
+        self.dropped = False
+
+    def push(self, frame: str) -> bool:
+        try:
+            self.queue.put_nowait(frame)
+            return True
+        except asyncio.QueueFull:
+            return False
+
+    def drop(self):
+        self.dropped = True
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.queue.put_nowait(None)
+
+    async def next_frame(self) -> Optional[str]:
+        return await self.queue.get()
+
+
+class MetricsBroadcaster:
+    """Pushes one metrics snapshot per tick to every WebSocket subscriber.
+
+    The snapshot is taken and serialized once per tick, whatever the number
+    of subscribers, and the same string is queued for each of them. Delta
+    subscribers get a full snapshot first and then only the fields that
+    changed since the previous tick. A subscriber with `max_pending` frames
+    still unsent is dropped rather than slowing the loop down.
+
+    The tick task runs only while there are subscribers.
+    """
+
+    def __init__(self, metrics, interval_ms: int, max_pending: int):
+        self.metrics = metrics
+        self.interval = interval_ms / 1000
+        self.max_pending = max_pending
+
+        self.subscribers: Set[Subscriber] = set()
+        self.last_snapshot: Optional[dict] = None
+        self.last_full: Optional[str] = None
+        self.task: Optional[asyncio.Task] = None
+
+    def subscribe(self, delta: bool = False) -> Subscriber:
+        subscriber = Subscriber(delta, self.max_pending)
+        if delta and self.last_full is not None:
+            # Deltas are relative to the last tick, so start from its snapshot
+            subscriber.push(self.last_full)
+        self.subscribers.add(subscriber)
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self._tick_loop())
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber):
+        self.subscribers.discard(subscriber)
+        if not self.subscribers and self.task:
+            self.task.cancel()
+            self.task = None
+            self.last_snapshot = self.last_full = None
+
+    async def _tick_loop(self):
+        while True:
+            try:
+                await self.tick()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error("Metrics broadcast error: %s", e)
+            await asyncio.sleep(self.interval)
+
+    async def tick(self):
+        """Take one snapshot and queue it for all subscribers"""
+        data = await self.metrics.get_metrics()
+        full = json.dumps(data)
+        delta = None
+        if self.last_snapshot is not None and any(s.delta for s in self.subscribers):
+            delta = json.dumps(diff(self.last_snapshot, data))
+
+        for subscriber in list(self.subscribers):
+            frame = full if delta is None or not subscriber.delta else delta
+            if not subscriber.push(frame):
+                logger.warning("Dropping slow metrics subscriber")
+                self.subscribers.discard(subscriber)
+                subscriber.drop()
+
+        self.last_snapshot = data
+        self.last_full = full
@@ -0,0 +1,304 @@
+import asyncio
+import logging
+import time
+from typing import TYPE_CHECKING, Optional, Set
+
+from src.metrics_v2 import STAGE_HEADER_READ, STAGE_PAYLOAD_READ
+from src.protocol import PROTOCOL_V2
+
+if TYPE_CHECKING:
+    from src.tcp_server import TCP_Server
+
+logger = logging.getLogger(__name__)
+
+INITIAL_BUFFER_SIZE = 64 * 1024
+
+
+class FrameProtocol(asyncio.BufferedProtocol):
+    """Zero-copy alternative to the StreamReader path of `TCP_Server`.
+
+    The event loop reads straight into a per-connection buffer that is
+    reused across frames. Frames are parsed in place and their payloads
+    handed to the model as `memoryview` slices of that buffer, so a
+    payload view is only valid until its request has been answered.
+
+    Instead of one `wait_for` timer per read, each connection owns a
+    single timer that is re-armed lazily from the last time data arrived.
+
+    The object doubles as the connection's writer: it provides the
+    `write`/`writelines`/`drain`/`close`/`wait_closed`/`get_extra_info`
+    subset of `asyncio.StreamWriter` used by `TCP_Server`.
+    """
+
+    def __init__(self, server: "TCP_Server"):
+        self.server = server
+        self.loop = asyncio.get_running_loop()
+        self.transport: Optional[asyncio.Transport] = None
+        self.peer = None
+        self.accepted = False
+
+        self.header_size = server.protocol.header_size(server.protocol_version)
+        self.max_in_flight = (
+            server.max_in_flight if server.protocol_version == PROTOCOL_V2 else 1
+        )
+
+        # Unparsed bytes live in buffer[start:end]. Views handed out for
+        # in-flight requests pin the bytes before `start`, so the buffer is
+        # only compacted in place once `in_flight` drops to zero.
+        self.buffer = bytearray(INITIAL_BUFFER_SIZE)
+        self.view = memoryview(self.buffer)
+        self.start = 0
+        self.end = 0
+        self.in_flight = 0
+        self.tasks: Set[asyncio.Task] = set()
+        self.reading_paused = False
+        self.eof = False
+
+        # Stage timing of the frame being parsed; unlike the stream path this
+        # excludes idle time between requests
+        self.frame_started_ns = time.perf_counter_ns()
+        self.header_read_ns = 0
+
+        self.last_activity = self.loop.time()
+        self.timeout_handle: Optional[asyncio.TimerHandle] = None
+
+        self.write_paused = False
+        self.drain_waiters: list[asyncio.Future] = []
+        self.closed = self.loop.create_future()
+        self.responses = None
+
+    # asyncio.BufferedProtocol callbacks
+
+    def connection_made(self, transport: asyncio.Transport):
+        self.transport = transport
+        self.peer = transport.get_extra_info("peername")
+        self.accepted = self.server._register_connection(self)
+        if not self.accepted:
+            transport.close()
+            return
+        self.responses = self.server._response_writer(self)
+        self._arm_timeout(self.last_activity + self.server.payload_timeout_seconds)
+
+    def get_buffer(self, sizehint: int) -> memoryview:
+        if self.end == len(self.buffer):
+            self._compact(len(self.buffer) * (1 if self.start else 2))
+        return self.view[self.end :]
+
+    def buffer_updated(self, nbytes: int):
+        if self.start == self.end:
+            self.frame_started_ns = time.perf_counter_ns()
+        self.end += nbytes
+        self.last_activity = self.loop.time()
+        self._parse_frames()
+
+    def eof_received(self) -> bool:
+        # Keep the transport open so in-flight responses can still be sent
+        self.eof = True
+        return bool(self.in_flight)
+
+    def connection_lost(self, exc: Optional[Exception]):
+        if self.timeout_handle:
+            self.timeout_handle.cancel()
+        for task in self.tasks:
+            task.cancel()
+        for waiter in self.drain_waiters:
+            if not waiter.done():
+                waiter.set_exception(ConnectionResetError("Connection lost"))
+        self.drain_waiters.clear()
+        if not self.closed.done():
+            self.closed.set_result(None)
+
+        if not self.accepted:
+            return
+        if exc:
+            logger.error("Error handling %s: %s", self.peer, exc)
+            self.server.metrics.add_error()
+        else:
+            logger.info("Client %s disconnected", self.peer)
+        asyncio.ensure_future(self.server._cleanup_connection(self, self.peer))
+
+    def pause_writing(self):
+        self.write_paused = True
+
+    def resume_writing(self):
+        self.write_paused = False
+        for waiter in self.drain_waiters:
+            if not waiter.done():
+                waiter.set_result(None)
+        self.drain_waiters.clear()
+
+    # StreamWriter-compatible surface wrapped by `ResponseWriter`
+
+    def write(self, data: bytes):
+        self.transport.write(data)
+
+    def writelines(self, data):
+        self.transport.writelines(data)
+
+    async def drain(self):
+        if self.transport.is_closing():
+            raise ConnectionResetError("Connection lost")
+        if not self.write_paused:
+            return
+        waiter = self.loop.create_future()
+        self.drain_waiters.append(waiter)
+        await waiter
+
+    def close(self):
+        if self.transport:
+            self.transport.close()
+
+    async def wait_closed(self):
+        await self.closed
+
+    def get_extra_info(self, name: str, default=None):
+        return self.transport.get_extra_info(name, default)
+
+    # Frame handling
+
+    def _parse_frames(self):
+        protocol = self.server.protocol
+        metrics = self.server.metrics
+        now = time.perf_counter_ns()
+        while self.in_flight < self.max_in_flight:
+            available = self.end - self.start
+            if available < self.header_size:
+                self._ensure_capacity(self.header_size)
+                break
+
+            header_view = self.view[self.start : self.start + self.header_size]
+            try:
+                if self.server.protocol_version == PROTOCOL_V2:
+                    header = protocol.unpack_header(header_view)
+                    payload_len = header.length
+                else:
+                    header = None
+                    payload_len = protocol.unpack_length(header_view)
+            except ValueError as e:
+                logger.error("Invalid frame from %s: %s", self.peer, e)
+                self.server.metrics.add_error()
+                self.transport.close()
+                return
+
+            if payload_len > self.server.max_payload_size:
+                logger.error(
+                    "Payload too large from %s: %d bytes", self.peer, payload_len
+                )
+                self.server.metrics.add_error()
+                self.transport.close()
+                return
+
+            if not self.header_read_ns:
+                self.header_read_ns = now
+                metrics.record_stage(STAGE_HEADER_READ, self.frame_started_ns, now)
+
+            frame_size = self.header_size + payload_len
+            if available < frame_size:
+                self._ensure_capacity(frame_size)
+                break
+
+            metrics.record_stage(STAGE_PAYLOAD_READ, self.header_read_ns, now)
+            self.header_read_ns = 0
+            self.frame_started_ns = now
+
+            payload_start = self.start + self.header_size
+            payload = self.view[payload_start : payload_start + payload_len]
+            self.start += frame_size
+            logger.debug("Received %d bytes from %s", payload_len, self.peer)
+
+            if payload_len:
+                self._dispatch(header, payload)
+
+        self._update_reading()
+
+    def _ensure_capacity(self, frame_size: int):
+        """Make room for a frame of `frame_size` bytes starting at `start`"""
+        if self.start + frame_size <= len(self.buffer):
+            return
+        if self.in_flight:
+            # Views into the buffer are still in use; the frame is finished
+            # off by _request_done once they have been released
+            return
+        self._compact(max(len(self.buffer), frame_size))
+
+    def _compact(self, capacity: int):
+        """Move unparsed bytes to the front, growing the buffer if needed"""
+        unparsed = self.end - self.start
+        if capacity > len(self.buffer) or self.in_flight:
+            # A fresh buffer leaves views held by in-flight requests intact
+            buffer = bytearray(capacity)
+            buffer[:unparsed] = self.view[self.start : self.end]
+            self.buffer = buffer
+            self.view = memoryview(buffer)
+        else:
+            self.buffer[:unparsed] = self.buffer[self.start : self.end]
+        self.start = 0
+        self.end = unparsed
+
+    def _update_reading(self):
+        if self.transport.is_closing():
+            return
+        # Stop reading at the in-flight limit or once the buffer is full and
+        # pinned by in-flight views
+        should_pause = self.in_flight >= self.max_in_flight or bool(
+            self.in_flight and self.end == len(self.buffer)
+        )
+        if should_pause and not self.reading_paused:
+            self.transport.pause_reading()
+            self.reading_paused = True
+        elif not should_pause and self.reading_paused:
+            self.transport.resume_reading()
+            self.reading_paused = False
+
+    def _dispatch(self, header, payload: memoryview):
+        self.in_flight += 1
+        if header is None:
+            coro = self._process_sequential(payload)
+        else:
+            coro = self.server._process_frame(
+                header, payload, self.responses, self.peer
+            )
+        task = asyncio.ensure_future(coro)
+        self.tasks.add(task)
+        task.add_done_callback(self._request_done)
+
+    async def _process_sequential(self, payload: memoryview):
+        if await self.server._process_payload(payload, self.responses, self.peer):
+            self.server.metrics.add_request()
+
+    def _request_done(self, task: asyncio.Task):
+        self.tasks.discard(task)
+        self.in_flight -= 1
+        self.last_activity = self.loop.time()
+        if self.transport.is_closing():
+            return
+        if not self.in_flight and self.start == self.end:
+            self.start = self.end = 0
+        self._parse_frames()
+
+        if self.eof and not self.in_flight and not self.transport.is_closing():
+            self.responses.flush()
+            self.transport.close()
+
+    # Per-connection deadline
+
+    def _arm_timeout(self, when: float):
+        self.timeout_handle = self.loop.call_at(when, self._on_timeout)
+
+    def _on_timeout(self):
+        timeout = self.server.payload_timeout_seconds
+        deadline = self.last_activity + timeout
+        if self.loop.time() < deadline or self.in_flight:
+            self._arm_timeout(max(deadline, self.loop.time() + 0.001))
+            return
+
+        self.server.metrics.add_error()
+        if self.start < self.end:
+            # Stuck mid-frame: the stream cannot be resynchronised
+            logger.warning("Timeout reading payload from %s", self.peer)
+            self.transport.close()
+            return
+
+        logger.warning("Timeout reading from %s", self.peer)
+        self.last_activity = self.loop.time()
+        self._arm_timeout(self.last_activity + timeout)
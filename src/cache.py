@@ -0,0 +1,71 @@
+import hashlib
+import logging
+import time
+from collections import OrderedDict
+from typing import NamedTuple, Optional
+
+from src.metrics_v2 import Metrics
+
+logger = logging.getLogger(__name__)
+
+# Rough per-entry cost of the dict slot, tuple and bytes headers
+ENTRY_OVERHEAD = 200
+
+
+def payload_key(payload: bytes) -> bytes:
+    """128-bit content hash identifying identical payloads"""
+    return hashlib.blake2b(payload, digest_size=16).digest()
+
+
+class CacheEntry(NamedTuple):
+    response: bytes
+    expires_at: float
+    size: int
+
+
+class InferenceCache:
+    """Content-addressed LRU cache of inference responses.
+
+    Payloads are keyed by their `payload_key` digest, so the payload itself
+    is not kept. Entries expire after `ttl_seconds` and the least recently
+    used ones are evicted to keep the total below `max_bytes`. Used from
+    the event loop only, so no locking is needed.
+    """
+
+    def __init__(self, max_bytes: int, ttl_seconds: float, metrics: Metrics):
+        self.max_bytes = max_bytes
+        self.ttl = ttl_seconds
+        self.metrics = metrics
+        self.entries: OrderedDict[bytes, CacheEntry] = OrderedDict()
+        self.size = 0
+
+    def get(self, key: bytes) -> Optional[bytes]:
+        entry = self.entries.get(key)
+        if entry is None:
+            self.metrics.add_cache_miss()
+            return None
+        if entry.expires_at <= time.monotonic():
+            self._remove(key)
+            self.metrics.add_cache_miss()
+            return None
+        self.entries.move_to_end(key)
+        self.metrics.add_cache_hit()
+        return entry.response
+
+    def put(self, key: bytes, response: bytes):
+        response = bytes(response)
+        size = len(response) + len(key) + ENTRY_OVERHEAD
+        if size > self.max_bytes:
+            return
+        if key in self.entries:
+            self._remove(key)
+
+        while self.size + size > self.max_bytes:
+            self._remove(next(iter(self.entries)))
+            self.metrics.add_cache_eviction()
+
+        self.entries[key] = CacheEntry(response, time.monotonic() + self.ttl, size)
+        self.size += size
+
+    def _remove(self, key: bytes):
+        self.size -= self.entries.pop(key).size
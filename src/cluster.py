@@ -0,0 +1,116 @@
+import logging
+import time
+from multiprocessing.context import BaseContext
+
+from src.metrics_v2 import COUNTERS, ROW_SIZE, derived_metrics, rate_counters
+from src.rates import windowed_rates
+
+logger = logging.getLogger(__name__)
+
+# Counters describing live state rather than totals; not carried over from
+# crashed workers
+GAUGES = ("connections", "admission_limit", "inference_queue_depth")
+
+
+class ClusterState:
+    """Shared memory used by the supervisor and its worker processes.
+
+    Each worker owns one row of `counters`, the int64 slots its
+    `metrics_v2.Metrics` increments in place, and one slot of
+    `connections`, its number of open connections. `connections` is
+    guarded by `lock` so the connection limit holds across the whole
+    cluster. Created by the supervisor and handed to workers as a
+    `Process` argument.
+    """
+
+    def __init__(self, workers: int, max_connections: int, ctx: BaseContext):
+        self.workers = workers
+        self.max_connections = max_connections
+        self.counters = ctx.Array("q", workers * ROW_SIZE, lock=False)
+        self.connections = ctx.Array("q", workers, lock=False)
+        self.lock = ctx.Lock()
+
+    def worker_counters(self, worker: int) -> memoryview:
+        """Counter slots of one worker, for `Metrics(counters=...)`"""
+        offset = worker * ROW_SIZE
+        view = memoryview(self.counters).cast("B").cast("q")
+        return view[offset : offset + ROW_SIZE]
+
+    def row(self, worker: int) -> dict:
+        counters = self.worker_counters(worker)[: len(COUNTERS)]
+        return dict(zip(COUNTERS, counters.tolist()))
+
+    def reset(self, worker: int):
+        """Clear a dead worker's row and release its connection slots"""
+        counters = self.worker_counters(worker)
+        for i in range(ROW_SIZE):
+            counters[i] = 0
+        with self.lock:
+            self.connections[worker] = 0
+
+
+class GlobalConnectionLimiter:
+    """Enforces `max_connections` across all workers of a cluster"""
+
+    def __init__(self, state: ClusterState, worker: int):
+        self.state = state
+        self.worker = worker
+
+    def try_acquire(self) -> bool:
+        with self.state.lock:
+            if sum(self.state.connections) >= self.state.max_connections:
+                return False
+            self.state.connections[self.worker] += 1
+            return True
+
+    def release(self):
+        with self.state.lock:
+            self.state.connections[self.worker] -= 1
+
+
+class ClusterMetrics:
+    """Cluster-wide view of worker metrics, served by the supervisor.
+
+    Totals are the sum of all worker rows plus the counters of workers
+    that have crashed and been restarted, so they never go backwards.
+    """
+
+    def __init__(self, state: ClusterState):
+        self.state = state
+        self.initial_time = time.time()
+        self.retired = {name: 0 for name in COUNTERS if name not in GAUGES}
+        self.rates = [
+            rate_counters(state.worker_counters(worker))
+            for worker in range(state.workers)
+        ]
+        self.worker_info: list[dict] = [
+            {"pid": None, "alive": False, "restarts": 0} for _ in range(state.workers)
+        ]
+
+    def retire(self, worker: int):
+        """Fold a dead worker's counters into the totals and clear its row"""
+        row = self.state.row(worker)
+        for name in self.retired:
+            self.retired[name] += row[name]
+        self.state.reset(worker)
+
+    async def get_metrics(self):
+        workers = []
+        totals = {**{name: 0 for name in GAUGES}, **self.retired}
+        for worker in range(self.state.workers):
+            row = self.state.row(worker)
+            for name in totals:
+                totals[name] += row[name]
+            workers.append({"worker": worker, **self.worker_info[worker], **row})
+
+        data = {
+            "initial_time": self.initial_time,
+            "uptime": time.time() - self.initial_time,
+            **totals,
+        }
+        data.update(derived_metrics(data))
+        data["windows"] = windowed_rates(
+            {name: [rates[name] for rates in self.rates] for name in self.rates[0]}
+        )
+        data["workers"] = workers
+        return data
@@ -0,0 +1,39 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable
+
+from src.metrics_v2 import Metrics
+
+logger = logging.getLogger(__name__)
+
+
+class RequestCoalescer:
+    """Single-flight deduplication of identical in-flight inference requests.
+
+    The first request for a key starts the computation as its own task;
+    identical requests arriving before it finishes await that task instead
+    of running the model again, and every caller gets the same response
+    (or exception). Callers that go away do not cancel the computation for
+    the others.
+    """
+
+    def __init__(self, metrics: Metrics):
+        self.metrics = metrics
+        self.in_flight: dict[bytes, asyncio.Task] = {}
+
+    async def run(self, key: bytes, compute: Callable[[], Awaitable[bytes]]) -> bytes:
+        task = self.in_flight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(compute())
+            self.in_flight[key] = task
+            task.add_done_callback(lambda t: self._done(key, t))
+        else:
+            self.metrics.add_coalesced_request()
+        return await asyncio.shield(task)
+
+    def _done(self, key: bytes, task: asyncio.Task):
+        if self.in_flight.get(key) is task:
+            del self.in_flight[key]
+        # Mark the exception as retrieved when every caller has gone away
+        if not task.cancelled():
+            task.exception()
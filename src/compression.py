@@ -0,0 +1,139 @@
+import logging
+import time
+import zlib
+from abc import ABC, abstractmethod
+from typing import Iterator, Optional
+
+from src.metrics_v2 import Metrics
+
+logger = logging.getLogger(__name__)
+
+# Codec byte of a version 2 header that names no codec
+CODEC_NONE = 0
+
+# Decompressed bytes produced per step, bounding temporary allocations
+DECOMPRESS_CHUNK_SIZE = 64 * 1024
+
+
+class PayloadTooLarge(ValueError):
+    """Raised when a payload decompresses to more than the allowed size"""
+
+
+class CompressionCodec(ABC):
+    """A payload compression algorithm, identified on the wire by `codec_id`"""
+
+    codec_id: int
+    name: str
+
+    @abstractmethod
+    def compress(self, data: bytes) -> bytes:
+        pass
+
+    @abstractmethod
+    def decompress_chunks(self, data: bytes, max_size: int) -> Iterator[bytes]:
+        """Yield the decompressed data in chunks, raising `PayloadTooLarge`
+        as soon as more than `max_size` bytes would be produced"""
+
+
+class ZlibCodec(CompressionCodec):
+    codec_id = 1
+    name = "zlib"
+
+    def __init__(self, level: int = 1):
+        self.level = level
+
+    def compress(self, data: bytes) -> bytes:
+        return zlib.compress(data, self.level)
+
+    def decompress_chunks(self, data: bytes, max_size: int) -> Iterator[bytes]:
+        decompressor = zlib.decompressobj()
+        produced = 0
+        while not decompressor.eof:
+            # Bounded output per call; pending output is drained by calling
+            # again, so flush() (which is unbounded) is never needed
+            chunk = decompressor.decompress(data, DECOMPRESS_CHUNK_SIZE)
+            data = decompressor.unconsumed_tail
+            if not chunk and not data:
+                raise zlib.error("Incomplete compressed payload")
+            produced += len(chunk)
+            if produced > max_size:
+                raise PayloadTooLarge(f"Payload decompresses to over {max_size} bytes")
+            yield chunk
+
+
+# Codecs the server accepts, by wire id. Add faster ones with `register_codec`.
+CODECS: dict[int, CompressionCodec] = {}
+
+
+def register_codec(codec: CompressionCodec):
+    if codec.codec_id == CODEC_NONE or not 0 < codec.codec_id < 256:
+        raise ValueError(f"Invalid codec id: {codec.codec_id}")
+    CODECS[codec.codec_id] = codec
+
+
+register_codec(ZlibCodec())
+
+
+class PayloadCompression:
+    """Server-side decompression of requests and compression of responses.
+
+    Requests are decompressed chunk by chunk into buffers of
+    `max_payload_size` bytes that are reused across frames, so the
+    decompressed size is bounded before anything grows past it. Responses shorter than `min_size` are never
+    compressed. Byte counts and codec CPU time go to `metrics`.
+    """
+
+    def __init__(
+        self,
+        metrics: Metrics,
+        max_payload_size: int,
+        min_size: int,
+        max_pooled_buffers: int = 8,
+    ):
+        self.metrics = metrics
+        self.max_payload_size = max_payload_size
+        self.min_size = min_size
+        self.max_pooled_buffers = max_pooled_buffers
+        self.buffers: list[bytearray] = []
+
+    def decompress(self, codec_id: int, data: bytes) -> bytes:
+        """Decompressed payload, raising `ValueError` for unknown codecs and
+        payloads over `max_payload_size` and `zlib.error` for corrupt ones"""
+        codec = CODECS.get(codec_id)
+        if codec is None:
+            raise ValueError(f"Unknown compression codec: {codec_id}")
+
+        buffer = (
+            self.buffers.pop() if self.buffers else bytearray(self.max_payload_size)
+        )
+        size = 0
+        started = time.thread_time_ns()
+        try:
+            for chunk in codec.decompress_chunks(data, self.max_payload_size):
+                buffer[size : size + len(chunk)] = chunk
+                size += len(chunk)
+            # One exact-size copy, so the buffer is free again right away
+            payload = bytes(memoryview(buffer)[:size])
+        except Exception:
+            self.metrics.add_compression(0, 0, time.thread_time_ns() - started)
+            raise
+        finally:
+            if len(self.buffers) < self.max_pooled_buffers:
+                self.buffers.append(buffer)
+        self.metrics.add_compression(size, len(data), time.thread_time_ns() - started)
+        return payload
+
+    def compress(self, codec_id: int, data: bytes) -> Optional[bytes]:
+        """Compressed `data`, or None if it should be sent as is"""
+        codec = CODECS.get(codec_id)
+        if codec is None or len(data) < self.min_size:
+            return None
+        started = time.thread_time_ns()
+        compressed = codec.compress(data)
+        cpu_ns = time.thread_time_ns() - started
+        if len(compressed) >= len(data):
+            # Incompressible, sent as is
+            self.metrics.add_compression(0, 0, cpu_ns)
+            return None
+        self.metrics.add_compression(len(data), len(compressed), cpu_ns)
+        return compressed
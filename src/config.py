@@ -14,6 +14,27 @@ class Config:
     max_connections: int
     max_payload_size_kb: int
     payload_timeout_seconds: int
+    batch_max_size: int
+    batch_max_wait_us: int
+    inference_mode: str
+    inference_workers: int
+    protocol_version: int
+    max_in_flight_per_connection: int
+    transport: str
+    latency_window_seconds: int
+    ws_metrics_interval_ms: int
+    ws_max_pending_frames: int
+    prometheus_cache_seconds: int
+    cache_max_bytes: int
+    cache_ttl_seconds: int
+    coalesce_requests: bool
+    admission_target_latency_ms: int
+    admission_max_limit: int
+    accept_rate_per_second: int
+    accept_throttle_threshold_percent: int
+    write_high_water_kb: int
+    write_coalescing: bool
+    compression_min_bytes: int
 
     def __post_init__(self):
         """Validate configuration values"""
@@ -48,6 +69,107 @@ class Config:
                 f"Max connections must be positive, got {self.max_connections}"
             )
 
+        if self.batch_max_size <= 0:
+            raise ValueError(
+                f"Batch max size must be positive, got {self.batch_max_size}"
+            )
+
+        if self.batch_max_wait_us < 0:
+            raise ValueError(
+                f"Batch max wait must be non-negative, got {self.batch_max_wait_us}"
+            )
+
+        if self.inference_mode not in ["inline", "thread", "process"]:
+            raise ValueError(f"Invalid inference mode: {self.inference_mode}")
+
+        if self.inference_workers <= 0:
+            raise ValueError(
+                f"Inference workers must be positive, got {self.inference_workers}"
+            )
+
+        if self.protocol_version not in [1, 2]:
+            raise ValueError(
+                f"Protocol version must be 1 or 2, got {self.protocol_version}"
+            )
+
+        if self.max_in_flight_per_connection <= 0:
+            raise ValueError(
+                "Max in-flight requests per connection must be positive, "
+                f"got {self.max_in_flight_per_connection}"
+            )
+
+        if self.transport not in ["stream", "buffered"]:
+            raise ValueError(f"Invalid transport: {self.transport}")
+
+        if self.latency_window_seconds <= 0:
+            raise ValueError(
+                "Latency window must be positive, " f"got {self.latency_window_seconds}"
+            )
+
+        if self.ws_metrics_interval_ms <= 0:
+            raise ValueError(
+                "WebSocket metrics interval must be positive, "
+                f"got {self.ws_metrics_interval_ms}"
+            )
+
+        if self.ws_max_pending_frames <= 0:
+            raise ValueError(
+                "WebSocket max pending frames must be positive, "
+                f"got {self.ws_max_pending_frames}"
+            )
+
+        if self.prometheus_cache_seconds < 0:
+            raise ValueError(
+                "Prometheus cache duration must be non-negative, "
+                f"got {self.prometheus_cache_seconds}"
+            )
+
+        if self.cache_max_bytes < 0:
+            raise ValueError(
+                f"Cache max bytes must be non-negative, got {self.cache_max_bytes}"
+            )
+
+        if self.cache_ttl_seconds <= 0:
+            raise ValueError(
+                f"Cache TTL must be positive, got {self.cache_ttl_seconds}"
+            )
+
+        if self.admission_target_latency_ms < 0:
+            raise ValueError(
+                "Admission target latency must be non-negative, "
+                f"got {self.admission_target_latency_ms}"
+            )
+
+        if self.admission_max_limit <= 0:
+            raise ValueError(
+                "Admission max limit must be positive, "
+                f"got {self.admission_max_limit}"
+            )
+
+        if self.accept_rate_per_second < 0:
+            raise ValueError(
+                "Accept rate must be non-negative, "
+                f"got {self.accept_rate_per_second}"
+            )
+
+        if not (1 <= self.accept_throttle_threshold_percent <= 100):
+            raise ValueError(
+                "Accept throttle threshold must be between 1-100 percent, "
+                f"got {self.accept_throttle_threshold_percent}"
+            )
+
+        if self.write_high_water_kb < 0:
+            raise ValueError(
+                "Write high-water mark must be non-negative, "
+                f"got {self.write_high_water_kb}"
+            )
+
+        if self.compression_min_bytes < 0:
+            raise ValueError(
+                "Compression threshold must be non-negative, "
+                f"got {self.compression_min_bytes}"
+            )
+
     @classmethod
     def from_env(cls) -> "Config":
         """Load configuration from environment variables"""
@@ -61,6 +183,35 @@ class Config:
             max_connections=int(os.getenv("MAX_CONNECTIONS", "100")),
             max_payload_size_kb=int(os.getenv("MAX_PAYLOAD_SIZE_KB", "1024")),
             payload_timeout_seconds=int(os.getenv("PAYLOAD_TIMEOUT_SECONDS", "30")),
+            batch_max_size=int(os.getenv("BATCH_MAX_SIZE", "1")),
+            batch_max_wait_us=int(os.getenv("BATCH_MAX_WAIT_US", "500")),
+            inference_mode=os.getenv("INFERENCE_MODE", "inline"),
+            inference_workers=int(os.getenv("INFERENCE_WORKERS", "4")),
+            protocol_version=int(os.getenv("PROTOCOL_VERSION", "1")),
+            max_in_flight_per_connection=int(
+                os.getenv("MAX_IN_FLIGHT_PER_CONNECTION", "8")
+            ),
+            transport=os.getenv("TRANSPORT", "stream"),
+            latency_window_seconds=int(os.getenv("LATENCY_WINDOW_SECONDS", "60")),
+            ws_metrics_interval_ms=int(os.getenv("WS_METRICS_INTERVAL_MS", "250")),
+            ws_max_pending_frames=int(os.getenv("WS_MAX_PENDING_FRAMES", "4")),
+            prometheus_cache_seconds=int(os.getenv("PROMETHEUS_CACHE_SECONDS", "5")),
+            cache_max_bytes=int(os.getenv("CACHE_MAX_BYTES", "0")),
+            cache_ttl_seconds=int(os.getenv("CACHE_TTL_SECONDS", "60")),
+            coalesce_requests=os.getenv("COALESCE_REQUESTS", "false").lower()
+            in ["1", "true", "yes"],
+            admission_target_latency_ms=int(
+                os.getenv("ADMISSION_TARGET_LATENCY_MS", "0")
+            ),
+            admission_max_limit=int(os.getenv("ADMISSION_MAX_LIMIT", "256")),
+            accept_rate_per_second=int(os.getenv("ACCEPT_RATE_PER_SECOND", "0")),
+            accept_throttle_threshold_percent=int(
+                os.getenv("ACCEPT_THROTTLE_THRESHOLD_PERCENT", "90")
+            ),
+            write_high_water_kb=int(os.getenv("WRITE_HIGH_WATER_KB", "64")),
+            write_coalescing=os.getenv("WRITE_COALESCING", "true").lower()
+            in ["1", "true", "yes"],
+            compression_min_bytes=int(os.getenv("COMPRESSION_MIN_BYTES", "1024")),
         )
 
     @classmethod
@@ -81,6 +232,33 @@ class Config:
             max_connections=section.getint("MAX_CONNECTIONS", 100),
             max_payload_size_kb=section.getint("MAX_PAYLOAD_SIZE_KB", 1024),
             payload_timeout_seconds=section.getint("PAYLOAD_TIMEOUT_SECONDS", 30),
+            batch_max_size=section.getint("BATCH_MAX_SIZE", 1),
+            batch_max_wait_us=section.getint("BATCH_MAX_WAIT_US", 500),
+            inference_mode=section.get("INFERENCE_MODE", "inline"),
+            inference_workers=section.getint("INFERENCE_WORKERS", 4),
+            protocol_version=section.getint("PROTOCOL_VERSION", 1),
+            max_in_flight_per_connection=section.getint(
+                "MAX_IN_FLIGHT_PER_CONNECTION", 8
+            ),
+            transport=section.get("TRANSPORT", "stream"),
+            latency_window_seconds=section.getint("LATENCY_WINDOW_SECONDS", 60),
+            ws_metrics_interval_ms=section.getint("WS_METRICS_INTERVAL_MS", 250),
+            ws_max_pending_frames=section.getint("WS_MAX_PENDING_FRAMES", 4),
+            prometheus_cache_seconds=section.getint("PROMETHEUS_CACHE_SECONDS", 5),
+            cache_max_bytes=section.getint("CACHE_MAX_BYTES", 0),
+            cache_ttl_seconds=section.getint("CACHE_TTL_SECONDS", 60),
+            coalesce_requests=section.getboolean("COALESCE_REQUESTS", False),
+            admission_target_latency_ms=section.getint(
+                "ADMISSION_TARGET_LATENCY_MS", 0
+            ),
+            admission_max_limit=section.getint("ADMISSION_MAX_LIMIT", 256),
+            accept_rate_per_second=section.getint("ACCEPT_RATE_PER_SECOND", 0),
+            accept_throttle_threshold_percent=section.getint(
+                "ACCEPT_THROTTLE_THRESHOLD_PERCENT", 90
+            ),
+            write_high_water_kb=section.getint("WRITE_HIGH_WATER_KB", 64),
+            write_coalescing=section.getboolean("WRITE_COALESCING", True),
+            compression_min_bytes=section.getint("COMPRESSION_MIN_BYTES", 1024),
         )
 
 
@@ -1,18 +1,92 @@
 import logging
+from typing import Optional
 
 import uvicorn
 
+from src.admission import AcceptThrottle, AdaptiveConcurrencyLimit
+from src.batching import BatchScheduler
+from src.cache import InferenceCache
+from src.coalescing import RequestCoalescer
+from src.compression import PayloadCompression
 from src.config import config, debug_config
 from src.http_server import app
+from src.inference import InferenceExecutor
 from src.metrics_v2 import Metrics
 from src.ml_interface import ML_Interface
-from src.protocol import Protocol
-from src.tcp_server import TCP_Server
+from src.protocol import FrameCodec
+from src.tcp_server import ConnectionLimiter, TCP_Server
 
 
-def setup_tcp_server(metrics: Metrics) -> TCP_Server:
+def setup_tcp_server(
+    metrics: Metrics,
+    reuse_port: bool = False,
+    connection_limiter: Optional[ConnectionLimiter] = None,
+) -> TCP_Server:
     logger = logging.getLogger(__name__)
 
+    ml_interface = ML_Interface()
+    executor = InferenceExecutor(
+        ml_interface=ml_interface,
+        mode=config.inference_mode,
+        workers=config.inference_workers,
+    )
+
+    # A batch size of 1 keeps the original one-call-per-frame path
+    batcher = None
+    if config.batch_max_size > 1:
+        batcher = BatchScheduler(
+            executor=executor,
+            metrics=metrics,
+            max_batch_size=config.batch_max_size,
+            max_wait_us=config.batch_max_wait_us,
+        )
+
+    # Responses of models that are not cacheable may differ between
+    # identical payloads, so they are neither cached nor coalesced
+    cache = None
+    coalescer = None
+    if not ml_interface.cacheable:
+        logger.info("Model is not cacheable, caching and coalescing disabled")
+    else:
+        # A budget of 0 disables caching
+        if config.cache_max_bytes > 0:
+            cache = InferenceCache(
+                max_bytes=config.cache_max_bytes,
+                ttl_seconds=config.cache_ttl_seconds,
+                metrics=metrics,
+            )
+        if config.coalesce_requests:
+            coalescer = RequestCoalescer(metrics)
+
+    # A target latency of 0 disables admission control
+    admission = None
+    if config.admission_target_latency_ms > 0:
+        admission = AdaptiveConcurrencyLimit(
+            metrics=metrics,
+            target_latency_ms=config.admission_target_latency_ms,
+            max_limit=config.admission_max_limit,
+        )
+
+    accept_throttle = None
+    if config.accept_rate_per_second > 0:
+        accept_throttle = AcceptThrottle(
+            metrics=metrics,
+            threshold=config.max_connections
+            * config.accept_throttle_threshold_percent
+            // 100,
+            rate_per_second=config.accept_rate_per_second,
+        )
+
+    # A threshold of 0 disables compression; requests that ask for it are
+    # then answered with STATUS_BAD_FRAME
+    compression = None
+    if config.compression_min_bytes > 0:
+        compression = PayloadCompression(
+            metrics=metrics,
+            max_payload_size=config.max_payload_size_kb * 1024,
+            min_size=config.compression_min_bytes,
+        )
+
     server = TCP_Server(
         host=config.host,
         port=config.port,
@@ -21,9 +95,23 @@ def setup_tcp_server(metrics: Metrics) -> TCP_Server:
         max_connections=config.max_connections,
         max_payload_size=config.max_payload_size_kb * 1024,
         payload_timeout_seconds=config.payload_timeout_seconds,
-        protocol=Protocol(),
-        ml_interface=ML_Interface(),
+        protocol=FrameCodec(config.length_field_size),
+        ml_interface=ml_interface,
         metrics=metrics,
+        executor=executor,
+        batcher=batcher,
+        protocol_version=config.protocol_version,
+        max_in_flight=config.max_in_flight_per_connection,
+        transport=config.transport,
+        reuse_port=reuse_port,
+        connection_limiter=connection_limiter,
+        cache=cache,
+        coalescer=coalescer,
+        admission=admission,
+        accept_throttle=accept_throttle,
+        write_high_water=config.write_high_water_kb * 1024,
+        write_coalescing=config.write_coalescing,
+        compression=compression,
     )
 
     logger.debug("Config: %s", debug_config())
@@ -31,6 +119,12 @@ def setup_tcp_server(metrics: Metrics) -> TCP_Server:
     return server
 
 
-def setup_http_server() -> uvicorn.Server:
+def setup_http_server(metrics=None) -> uvicorn.Server:
+    """HTTP monitoring server, reporting `metrics` if given (anything with an
+    async `get_metrics()`, e.g. cluster-wide metrics in worker mode)"""
+    if metrics is not None:
+        app.state.metrics = metrics
+        app.state.broadcaster.metrics = metrics
+        app.state.prometheus.metrics = metrics
     uvicorn_config = uvicorn.Config(app, host=config.host, port=8080, loop="asyncio")
     return uvicorn.Server(uvicorn_config)
@@ -0,0 +1,133 @@
+from bisect import bisect_left
+
+
+class Histogram:
+    """Fixed-bucket histogram, bucket `i` counts values <= bounds[i]"""
+
+    def __init__(self, bounds: list[float]):
+        self.bounds = sorted(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def record(self, value: float):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def snapshot(self) -> dict:
+        buckets = {str(bound): count for bound, count in zip(self.bounds, self.counts)}
+        buckets["+Inf"] = self.counts[-1]
+        return {"count": self.count, "sum": self.sum, "buckets": buckets}
+
+
+class LatencyHistogram:
+    """HDR-style log-linear histogram of non-negative integers (e.g. ns).
+
+    Values below 2**(sub_bucket_bits + 1) get exact buckets; above that
+    every power of two is split into 2**sub_bucket_bits linear buckets,
+    bounding the relative error to 2**-sub_bucket_bits with memory fixed
+    by `max_value_bits`. Recording is an integer bucket increment.
+    """
+
+    def __init__(self, sub_bucket_bits: int = 5, max_value_bits: int = 36):
+        self.sub_bucket_bits = sub_bucket_bits
+        self.linear_limit = 1 << (sub_bucket_bits + 1)
+        self.max_value = (1 << max_value_bits) - 1
+        self.counts = [0] * (self._index(self.max_value) + 1)
+        self.total = 0
+        self.max = 0
+
+    def _index(self, value: int) -> int:
+        if value < self.linear_limit:
+            return value
+        shift = value.bit_length() - self.sub_bucket_bits - 1
+        return (shift << self.sub_bucket_bits) + (value >> shift)
+
+    def _bucket_high(self, index: int) -> int:
+        """Highest value that maps to bucket `index`"""
+        if index < self.linear_limit:
+            return index
+        shift = (index >> self.sub_bucket_bits) - 1
+        low = (index - (shift << self.sub_bucket_bits)) << shift
+        return low + (1 << shift) - 1
+
+    def record(self, value: int):
+        if value > self.max_value:
+            value = self.max_value
+        elif value < 0:
+            value = 0
+        self.counts[self._index(value)] += 1
+        self.total += 1
+        if value > self.max:
+            self.max = value
+
+    def reset(self):
+        self.counts = [0] * len(self.counts)
+        self.total = 0
+        self.max = 0
+
+    def merge(self, other: "LatencyHistogram"):
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    def percentile(self, pct: float) -> int:
+        """Upper bound of the bucket holding the `pct` percentile"""
+        if not self.total:
+            return 0
+        rank = max(1, round(self.total * pct / 100))
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return min(self._bucket_high(index), self.max)
+        return self.max
+
+    def summary(self, scale: float = 1.0) -> dict:
+        """Count plus p50/p90/p99/p99.9/max, values divided by `scale`"""
+        return {
+            "count": self.total,
+            "p50": self.percentile(50) / scale,
+            "p90": self.percentile(90) / scale,
+            "p99": self.percentile(99) / scale,
+            "p99.9": self.percentile(99.9) / scale,
+            "max": self.max / scale,
+        }
+
+
+class RollingLatencyHistogram:
+    """`LatencyHistogram` over a sliding window of `window_ns`.
+
+    The window is split into `slices` histograms used as a ring; a slice
+    is cleared when the ring wraps back onto it, so memory stays fixed and
+    reads cover the last `window_ns` (give or take one slice).
+    """
+
+    def __init__(self, window_ns: int, slices: int = 6, **histogram_options):
+        self.slice_ns = window_ns // slices
+        self.slices = [LatencyHistogram(**histogram_options) for _ in range(slices)]
+        self.histogram_options = histogram_options
+        self.epoch = 0
+        self.current = self.slices[0]
+
+    def record(self, value: int, now_ns: int):
+        epoch = now_ns // self.slice_ns
+        if epoch != self.epoch:
+            self._rotate(epoch)
+        self.current.record(value)
+
+    def _rotate(self, epoch: int):
+        count = len(self.slices)
+        for step in range(1, min(epoch - self.epoch, count) + 1):
+            self.slices[(self.epoch + step) % count].reset()
+        self.epoch = epoch
+        self.current = self.slices[epoch % count]
+
+    def snapshot(self, now_ns: int) -> LatencyHistogram:
+        """Merged histogram of the current window"""
+        self._rotate(max(now_ns // self.slice_ns, self.epoch))
+        merged = LatencyHistogram(**self.histogram_options)
+        for histogram in self.slices:
+            merged.merge(histogram)
+        return merged
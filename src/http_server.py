@@ -1,30 +1,53 @@
-import asyncio
 import logging
 
-from fastapi import FastAPI, WebSocket
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+from fastapi.responses import JSONResponse, Response
 
+from src.broadcaster import MetricsBroadcaster
+from src.config import config
 from src.metrics_v2 import metrics
+from src.prometheus import CONTENT_TYPE, PrometheusExporter
 
 logger = logging.getLogger(__name__)
 
 app = FastAPI()
+app.state.metrics = metrics
+app.state.broadcaster = MetricsBroadcaster(
+    metrics,
+    interval_ms=config.ws_metrics_interval_ms,
+    max_pending=config.ws_max_pending_frames,
+)
+app.state.prometheus = PrometheusExporter(
+    metrics, cache_seconds=config.prometheus_cache_seconds
+)
 
 
 @app.get("/metrics")
 async def get_metrics():
-    data = await metrics.get_metrics()
+    data = await app.state.metrics.get_metrics()
     return JSONResponse(content=data)
 
 
+@app.get("/metrics/prometheus")
+async def get_prometheus_metrics():
+    text = await app.state.prometheus.render()
+    return Response(content=text, media_type=CONTENT_TYPE)
+
+
 @app.websocket("/metrics")
-async def ws_metrics(websocket: WebSocket):
+async def ws_metrics(websocket: WebSocket, delta: bool = False):
     await websocket.accept()
+    broadcaster = app.state.broadcaster
+    subscriber = broadcaster.subscribe(delta=delta)
     try:
-        while True:
-            data = await metrics.get_metrics()
-            await websocket.send_json(data)
-            await asyncio.sleep(0.25)
+        while (frame := await subscriber.next_frame()) is not None:
+            await websocket.send_text(frame)
+        # Dropped for falling behind, the client may reconnect
+        await websocket.close(code=1013)
+    except WebSocketDisconnect:
+        pass
     except Exception as e:
         logger.error(f"Error in websocket metrics: {e}")
         await websocket.close()
+    finally:
+        broadcaster.unsubscribe(subscriber)
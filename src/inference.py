@@ -0,0 +1,114 @@
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Optional
+
+from src.ml_interface_abstract import ML_Interface_Abstract
+
+logger = logging.getLogger(__name__)
+
+INFERENCE_MODES = ("inline", "thread", "process")
+
+# Model instance owned by a process pool worker, set once by the initializer
+_worker_ml_interface: Optional[ML_Interface_Abstract] = None
+
+
+def _init_process_worker(ml_interface: ML_Interface_Abstract):
+    global _worker_ml_interface
+    _worker_ml_interface = ml_interface
+
+
+def _process_run_inference(payload: bytes) -> bytes:
+    return _worker_ml_interface.run_inference(payload)
+
+
+def _process_run_batch_inference(payloads: list[bytes]) -> list[bytes]:
+    return _worker_ml_interface.run_batch_inference(payloads)
+
+
+class InferenceExecutor:
+    """Dispatches inference so blocking models stay off the event loop.
+
+    - inline: call `run_inference` on the loop (original behaviour)
+    - thread: `loop.run_in_executor` on a thread pool
+    - process: `loop.run_in_executor` on a process pool; the model is
+      pickled once per worker by the pool initializer, not per request
+
+    Models that implement `async_run_inference` natively are awaited
+    directly for single requests whatever the mode.
+    """
+
+    def __init__(
+        self,
+        ml_interface: ML_Interface_Abstract,
+        mode: str = "inline",
+        workers: int = 1,
+    ):
+        if mode not in INFERENCE_MODES:
+            raise ValueError(f"Invalid inference mode: {mode}")
+        if workers <= 0:
+            raise ValueError(f"Inference workers must be positive, got {workers}")
+
+        self.ml_interface = ml_interface
+        self.mode = mode
+        self.workers = workers
+        self.native_async = ml_interface.has_native_async()
+        self.pool: Optional[Executor] = None
+
+    def start(self):
+        if self.mode == "thread":
+            self.pool = ThreadPoolExecutor(
+                max_workers=self.workers, thread_name_prefix="inference"
+            )
+        elif self.mode == "process":
+            self.pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_process_worker,
+                initargs=(self.ml_interface,),
+            )
+        logger.info(
+            "Inference executor started (mode: %s, workers: %d, native async: %s)",
+            self.mode,
+            self.workers,
+            self.native_async,
+        )
+
+    def shutdown(self):
+        if self.pool:
+            self.pool.shutdown(wait=True, cancel_futures=True)
+            self.pool = None
+        logger.info("Inference executor stopped")
+
+    async def run(self, payload: bytes) -> bytes:
+        if self.native_async:
+            return await self.ml_interface.async_run_inference(payload)
+
+        if self.pool is None:
+            return self.ml_interface.run_inference(payload)
+
+        loop = asyncio.get_running_loop()
+        if self.mode == "process":
+            # memoryview payloads from the buffered transport cannot be pickled
+            return await loop.run_in_executor(
+                self.pool, _process_run_inference, bytes(payload)
+            )
+        return await loop.run_in_executor(
+            self.pool, self.ml_interface.run_inference, payload
+        )
+
+    async def run_batch(self, payloads: list[bytes]) -> list[bytes]:
+        if self.pool is None:
+            return self.ml_interface.run_batch_inference(payloads)
+
+        loop = asyncio.get_running_loop()
+        if self.mode == "process":
+            return await loop.run_in_executor(
+                self.pool,
+                _process_run_batch_inference,
+                [bytes(payload) for payload in payloads],
+            )
+        return await loop.run_in_executor(
+            self.pool, self.ml_interface.run_batch_inference, payloads
+        )
@@ -5,8 +5,227 @@ from collections import deque
 from dataclasses import dataclass
 from typing import Optional
 
+from src.config import config
+from src.histogram import Histogram, RollingLatencyHistogram
+from src.rates import WindowedCounter, windowed_rates
+
 logger = logging.getLogger(__name__)
 
+# Counter slots, in storage order
+COUNTERS = (
+    "connections",
+    "total_requests",
+    "errors",
+    "inference_errors",
+    "cache_hits",
+    "cache_misses",
+    "cache_evictions",
+    "coalesced_requests",
+    "admission_limit",
+    "inference_queue_depth",
+    "shed_requests",
+    "rejected_connections",
+    "compression_raw_bytes",
+    "compression_wire_bytes",
+    "compression_cpu_ns",
+)
+(
+    CONNECTIONS,
+    TOTAL_REQUESTS,
+    ERRORS,
+    INFERENCE_ERRORS,
+    CACHE_HITS,
+    CACHE_MISSES,
+    CACHE_EVICTIONS,
+    COALESCED_REQUESTS,
+    ADMISSION_LIMIT,
+    INFERENCE_QUEUE_DEPTH,
+    SHED_REQUESTS,
+    REJECTED_CONNECTIONS,
+    COMPRESSION_RAW_BYTES,
+    COMPRESSION_WIRE_BYTES,
+    COMPRESSION_CPU_NS,
+) = range(len(COUNTERS))
+
+# Request stages timed by TCP_Server, see `Metrics.record_stage`
+STAGES = ("header_read", "payload_read", "inference", "pack", "write")
+(
+    STAGE_HEADER_READ,
+    STAGE_PAYLOAD_READ,
+    STAGE_INFERENCE,
+    STAGE_PACK,
+    STAGE_WRITE,
+) = range(len(STAGES))
+
+
+# Events also counted per second for sliding-window rates, see src/rates.py
+RATED = ("requests", "errors", "inference_errors")
+RATE_HORIZON_SECONDS = 300
+
+# int64 slots per Metrics instance: COUNTERS, then one ring per RATED entry
+RING_SIZE = WindowedCounter.slots_needed(RATE_HORIZON_SECONDS)
+ROW_SIZE = len(COUNTERS) + len(RATED) * RING_SIZE
+
+
+def allocate_counters() -> memoryview:
+    """Zeroed int64 slots for a process-local Metrics instance"""
+    return memoryview(bytearray(8 * ROW_SIZE)).cast("q")
+
+
+def rate_counters(row: memoryview) -> dict[str, WindowedCounter]:
+    """Sliding-window counters stored in a row of ROW_SIZE slots"""
+    offset = len(COUNTERS)
+    return {
+        name: WindowedCounter(
+            row[offset + i * RING_SIZE : offset + (i + 1) * RING_SIZE],
+            RATE_HORIZON_SECONDS,
+        )
+        for i, name in enumerate(RATED)
+    }
+
+
+def derived_metrics(data: dict) -> dict:
+    """Calculated metrics from counter totals and uptime"""
+    derived = {
+        "requests_per_second": 0,
+        "error_rate": 0,
+        "inference_error_rate": 0,
+        "coalescing_ratio": 0,
+        "compression_ratio": 0,
+    }
+    if data["compression_wire_bytes"] > 0:
+        derived["compression_ratio"] = (
+            data["compression_raw_bytes"] / data["compression_wire_bytes"]
+        )
+    if data["total_requests"] > 0:
+        derived["requests_per_second"] = data["total_requests"] / data["uptime"]
+        derived["error_rate"] = data["errors"] / data["total_requests"]
+        derived["inference_error_rate"] = (
+            data["inference_errors"] / data["total_requests"]
+        )
+        derived["coalescing_ratio"] = (
+            data["coalesced_requests"] / data["total_requests"]
+        )
+    return derived
+
+
+class Metrics:
+    """Metrics backed by int64 counter slots updated in place.
+
+    Recording an event is a slot increment (plus one in a per-second ring
+    for sliding-window rates): no allocation, no queue and nothing to drop
+    under load. The slots can live in shared memory (see
+    `src.cluster.ClusterState`), in which case the supervisor reads them
+    directly.
+    """
+
+    def __init__(
+        self,
+        counters: Optional[memoryview] = None,
+        latency_window_seconds: int = config.latency_window_seconds,
+    ):
+        self.initial_time = time.time()
+        row = counters if counters is not None else allocate_counters()
+        self.counters = row[: len(COUNTERS)]
+        self.rates = rate_counters(row)
+        self.request_rate = self.rates["requests"]
+        self.error_rate = self.rates["errors"]
+        self.inference_error_rate = self.rates["inference_errors"]
+
+        # Per-stage latency in ns over a rolling window
+        self.stage_latency = [
+            RollingLatencyHistogram(latency_window_seconds * 1_000_000_000)
+            for _ in STAGES
+        ]
+
+        # Micro-batching histograms, see src/batching.py
+        self.inference_batch_size = Histogram([1, 2, 4, 8, 16, 32, 64, 128, 256])
+        self.inference_queue_wait_us = Histogram(
+            [10, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 50000]
+        )
+
+    async def start(self):
+        """Kept for API compatibility, counters need no background task"""
+        logger.info("Metrics started")
+
+    async def stop(self):
+        logger.info("Metrics stopped")
+
+    def add_request(self):
+        self.counters[TOTAL_REQUESTS] += 1
+        self.request_rate.add()
+
+    def add_error(self):
+        self.counters[ERRORS] += 1
+        self.error_rate.add()
+
+    def add_connection(self):
+        self.counters[CONNECTIONS] += 1
+
+    def remove_connection(self):
+        self.counters[CONNECTIONS] -= 1
+
+    def add_inference_error(self):
+        self.counters[INFERENCE_ERRORS] += 1
+        self.inference_error_rate.add()
+
+    def add_cache_hit(self):
+        self.counters[CACHE_HITS] += 1
+
+    def add_cache_miss(self):
+        self.counters[CACHE_MISSES] += 1
+
+    def add_cache_eviction(self):
+        self.counters[CACHE_EVICTIONS] += 1
+
+    def add_coalesced_request(self):
+        self.counters[COALESCED_REQUESTS] += 1
+
+    def set_admission_limit(self, limit: int):
+        self.counters[ADMISSION_LIMIT] = limit
+
+    def set_inference_queue_depth(self, depth: int):
+        self.counters[INFERENCE_QUEUE_DEPTH] = depth
+
+    def add_shed_request(self):
+        self.counters[SHED_REQUESTS] += 1
+
+    def add_rejected_connection(self):
+        self.counters[REJECTED_CONNECTIONS] += 1
+
+    def add_compression(self, raw_bytes: int, wire_bytes: int, cpu_ns: int):
+        self.counters[COMPRESSION_RAW_BYTES] += raw_bytes
+        self.counters[COMPRESSION_WIRE_BYTES] += wire_bytes
+        self.counters[COMPRESSION_CPU_NS] += cpu_ns
+
+    def add_batch(self, size: int, queue_waits_us: list[float]):
+        self.inference_batch_size.record(size)
+        for wait in queue_waits_us:
+            self.inference_queue_wait_us.record(wait)
+
+    def record_stage(self, stage: int, started_ns: int, ended_ns: int):
+        """Record a stage duration from two `time.perf_counter_ns` readings"""
+        self.stage_latency[stage].record(ended_ns - started_ns, ended_ns)
+
+    async def get_metrics(self):
+        """Get current metrics"""
+        data = {"initial_time": self.initial_time}
+        data["uptime"] = time.time() - self.initial_time
+        data.update(zip(COUNTERS, self.counters.tolist()))
+        data.update(derived_metrics(data))
+        data["windows"] = windowed_rates(
+            {name: [counter] for name, counter in self.rates.items()}
+        )
+        data["inference_batch_size"] = self.inference_batch_size.snapshot()
+        data["inference_queue_wait_us"] = self.inference_queue_wait_us.snapshot()
+
+        now_ns = time.perf_counter_ns()
+        data["stage_latency_us"] = {
+            name: histogram.snapshot(now_ns).summary(scale=1000)
+            for name, histogram in zip(STAGES, self.stage_latency)
+        }
+        return data
+
 
 @dataclass
 class MetricsEvent:
@@ -15,20 +234,17 @@ class MetricsEvent:
     data: Optional[dict] = None
 
 
-class Metrics:
+class QueuedMetrics(Metrics):
+    """Previous event-queue backend, kept for comparison benchmarks.
+
+    Every event is pushed through a bounded `asyncio.Queue` and applied by
+    a consumer task; events are dropped (and `queue_overload` set) once
+    the queue is full.
+    """
+
     def __init__(self, batch_size: int = 100, flush_interval: float = 1.0):
-        self.metrics = {
-            "initial_time": time.time(),
-            "uptime": 0,
-            "connections": 0,
-            "total_requests": 0,
-            "requests_per_second": 0,
-            "errors": 0,
-            "error_rate": 0,
-            "inference_errors": 0,
-            "inference_error_rate": 0,
-            "queue_overload": False,
-        }
+        super().__init__()
+        self.queue_overload = False
 
         # Queue for async processing
         self.event_queue = asyncio.Queue(maxsize=10000)
@@ -56,39 +272,34 @@ class Metrics:
                 pass
         logger.info("Metrics consumer stopped")
 
-    def add_request(self):
+    def _put(self, event_type: str, data: Optional[dict] = None):
         try:
-            self.event_queue.put_nowait(MetricsEvent("request", time.time()))
+            self.event_queue.put_nowait(MetricsEvent(event_type, time.time(), data))
         except asyncio.QueueFull:
-            self.metrics["queue_overload"] = True
+            self.queue_overload = True
+
+    def add_request(self):
+        self._put("request")
 
     def add_error(self):
-        try:
-            self.event_queue.put_nowait(MetricsEvent("error", time.time()))
-        except asyncio.QueueFull:
-            self.metrics["queue_overload"] = True
+        self._put("error")
 
     def add_connection(self):
-        try:
-            self.event_queue.put_nowait(MetricsEvent("connection", time.time()))
-        except asyncio.QueueFull:
-            self.metrics["queue_overload"] = True
+        self._put("connection")
 
     def remove_connection(self):
-        try:
-            self.event_queue.put_nowait(MetricsEvent("disconnection", time.time()))
-        except asyncio.QueueFull:
-            self.metrics["queue_overload"] = True
+        self._put("disconnection")
 
     def add_inference_error(self):
-        try:
-            self.event_queue.put_nowait(MetricsEvent("inference_error", time.time()))
-        except asyncio.QueueFull:
-            self.metrics["queue_overload"] = True
+        self._put("inference_error")
+
+    def add_batch(self, size: int, queue_waits_us: list[float]):
+        self._put("batch", {"size": size, "waits": queue_waits_us})
 
     async def get_metrics(self):
-        """Get current metrics"""
-        return self.metrics.copy()
+        data = await super().get_metrics()
+        data["queue_overload"] = self.queue_overload
+        return data
 
     async def _consumer_loop(self):
         """Background consumer that processes metrics events"""
@@ -96,7 +307,6 @@ class Metrics:
         last_flush = time.time()
 
         while self.running:
-            self.metrics["uptime"] = time.time() - self.metrics["initial_time"]
             try:
                 try:
                     event = await asyncio.wait_for(
@@ -112,7 +322,7 @@ class Metrics:
                     len(batch) > 0 and current_time - last_flush >= self.flush_interval
                 ):
 
-                    await self._process_batch(batch)
+                    self._process_batch(batch)
                     batch.clear()
                     last_flush = current_time
 
@@ -123,36 +333,21 @@ class Metrics:
                 logger.error(f"Metrics consumer error: {e}")
                 raise
 
-    async def _process_batch(self, batch: deque):
+    def _process_batch(self, batch: deque):
         """Process a batch of metrics events"""
         for event in batch:
             if event.event_type == "request":
-                self.metrics["total_requests"] += 1
+                super().add_request()
             elif event.event_type == "error":
-                self.metrics["errors"] += 1
+                super().add_error()
             elif event.event_type == "connection":
-                self.metrics["connections"] += 1
+                super().add_connection()
             elif event.event_type == "disconnection":
-                self.metrics["connections"] -= 1
+                super().remove_connection()
             elif event.event_type == "inference_error":
-                self.metrics["inference_errors"] += 1
-        self._update_derived_metrics()
-
-    def _update_derived_metrics(self):
-        """Update calculated metrics"""
-        current_time = time.time()
-        self.metrics["uptime"] = current_time - self.metrics["initial_time"]
-
-        if self.metrics["total_requests"] > 0:
-            self.metrics["requests_per_second"] = (
-                self.metrics["total_requests"] / self.metrics["uptime"]
-            )
-            self.metrics["error_rate"] = (
-                self.metrics["errors"] / self.metrics["total_requests"]
-            )
-            self.metrics["inference_error_rate"] = (
-                self.metrics["inference_errors"] / self.metrics["total_requests"]
-            )
+                super().add_inference_error()
+            elif event.event_type == "batch":
+                super().add_batch(event.data["size"], event.data["waits"])
 
 
 # Create shared instance
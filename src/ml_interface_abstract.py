@@ -2,10 +2,34 @@ from abc import ABC, abstractmethod
 
 
 class ML_Interface_Abstract(ABC):
+    # Whether identical payloads always get identical responses, allowing
+    # the server to cache them (see src/cache.py)
+    cacheable: bool = True
+
     @abstractmethod
     def run_inference(self, payload: bytes) -> bytes:
         pass
 
-    @abstractmethod
     async def async_run_inference(self, payload: bytes) -> bytes:
-        pass
+        """Async inference entry point.
+
+        Models with a genuinely non-blocking implementation should override
+        this; the server then awaits it directly instead of dispatching
+        `run_inference` to an executor. The default blocks on `run_inference`.
+        """
+        return self.run_inference(payload)
+
+    def run_batch_inference(self, payloads: list[bytes]) -> list[bytes]:
+        """Run inference on a batch, returning one response per payload.
+
+        Models that can vectorise across requests should override this;
+        the default simply loops over `run_inference`.
+        """
+        return [self.run_inference(payload) for payload in payloads]
+
+    def has_native_async(self) -> bool:
+        """Whether the model overrides `async_run_inference`"""
+        return (
+            type(self).async_run_inference
+            is not ML_Interface_Abstract.async_run_inference
+        )
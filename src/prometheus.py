@@ -0,0 +1,172 @@
+import asyncio
+import time
+from typing import Optional
+
+CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+PREFIX = "ml_server"
+
+# (key in get_metrics(), family name, help) of each exported counter
+COUNTER_FAMILIES = (
+    ("total_requests", "requests", "Requests answered"),
+    ("errors", "errors", "Connection and protocol errors"),
+    ("inference_errors", "inference_errors", "Failed inference calls"),
+    ("cache_hits", "cache_hits", "Responses served from the inference cache"),
+    ("cache_misses", "cache_misses", "Inference cache lookups that missed"),
+    ("cache_evictions", "cache_evictions", "Inference cache entries evicted"),
+    (
+        "coalesced_requests",
+        "coalesced_requests",
+        "Requests answered by an identical in-flight inference",
+    ),
+    ("shed_requests", "shed_requests", "Requests rejected as overloaded"),
+    ("rejected_connections", "rejected_connections", "Connections throttled"),
+    (
+        "compression_raw_bytes",
+        "compression_raw_bytes",
+        "Uncompressed size of compressed payloads",
+    ),
+    (
+        "compression_wire_bytes",
+        "compression_wire_bytes",
+        "Compressed size of compressed payloads",
+    ),
+    ("compression_cpu_ns", "compression_cpu_ns", "CPU time spent in codecs"),
+)
+
+# (key in get_metrics(), family name, help) of each exported gauge
+GAUGE_FAMILIES = (
+    ("connections", "connections", "Open client connections"),
+    ("admission_limit", "admission_limit", "Adaptive inference concurrency limit"),
+    ("inference_queue_depth", "inference_queue_depth", "Admitted inference requests"),
+)
+
+QUANTILES = (("p50", "0.5"), ("p90", "0.9"), ("p99", "0.99"), ("p99.9", "0.999"))
+
+
+def _labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    pairs = ",".join(f'{key}="{value}"' for key, value in labels.items())
+    return "{" + pairs + "}"
+
+
+def _number(value) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Writer:
+    def __init__(self):
+        self.lines: list[str] = []
+
+    def family(self, name: str, kind: str, help: str, unit: Optional[str] = None):
+        self.lines.append(f"# TYPE {PREFIX}_{name} {kind}")
+        if unit:
+            self.lines.append(f"# UNIT {PREFIX}_{name} {unit}")
+        self.lines.append(f"# HELP {PREFIX}_{name} {help}")
+
+    def sample(self, name: str, value, **labels):
+        self.lines.append(f"{PREFIX}_{name}{_labels(labels)} {_number(value)}")
+
+    def text(self) -> str:
+        return "\n".join(self.lines + ["# EOF", ""])
+
+
+def render_openmetrics(data: dict) -> str:
+    """OpenMetrics text for a `get_metrics()` dict.
+
+    Works on both `metrics_v2.Metrics` and `cluster.ClusterMetrics`
+    output; with the latter, counters and gauges are labelled per worker.
+    Durations are converted from microseconds to seconds.
+    """
+    out = _Writer()
+    rows = [({}, data)]
+    if "workers" in data:
+        rows = [({"worker": w["worker"]}, w) for w in data["workers"]]
+
+    out.family("uptime_seconds", "gauge", "Seconds since metrics started", "seconds")
+    out.sample("uptime_seconds", data["uptime"])
+
+    for key, name, help in GAUGE_FAMILIES:
+        out.family(name, "gauge", help)
+        for labels, row in rows:
+            out.sample(name, row[key], **labels)
+
+    for key, name, help in COUNTER_FAMILIES:
+        out.family(name, "counter", help)
+        for labels, row in rows:
+            out.sample(f"{name}_total", row[key], **labels)
+
+    if "inference_batch_size" in data:
+        _histogram(
+            out,
+            "inference_batch_size",
+            "Frames per inference batch",
+            data["inference_batch_size"],
+        )
+    if "inference_queue_wait_us" in data:
+        _histogram(
+            out,
+            "inference_queue_wait_seconds",
+            "Time frames waited for their batch",
+            data["inference_queue_wait_us"],
+            scale=1_000_000,
+            unit="seconds",
+        )
+
+    if "stage_latency_us" in data:
+        name = "stage_latency_seconds"
+        out.family(
+            name,
+            "gauge",
+            "Request stage latency quantiles over the rolling latency window",
+            "seconds",
+        )
+        for stage, summary in data["stage_latency_us"].items():
+            for key, quantile in QUANTILES:
+                out.sample(
+                    name, summary[key] / 1_000_000, stage=stage, quantile=quantile
+                )
+
+    return out.text()
+
+
+def _histogram(
+    out: _Writer,
+    name: str,
+    help: str,
+    snapshot: dict,
+    scale: float = 1,
+    unit: Optional[str] = None,
+):
+    """Render a `histogram.Histogram` snapshot with cumulative buckets"""
+    out.family(name, "histogram", help, unit)
+    cumulative = 0
+    for bound, count in snapshot["buckets"].items():
+        cumulative += count
+        le = bound if bound == "+Inf" else _number(float(bound) / scale)
+        out.sample(f"{name}_bucket", cumulative, le=le)
+    out.sample(f"{name}_count", snapshot["count"])
+    out.sample(f"{name}_sum", snapshot["sum"] / scale)
+
+
+class PrometheusExporter:
+    """Serves OpenMetrics text rendered at most once per `cache_seconds`.
+
+    Scrapes within the same interval get the cached text, and concurrent
+    scrapes of a stale cache wait for a single render.
+    """
+
+    def __init__(self, metrics, cache_seconds: float):
+        self.metrics = metrics
+        self.cache_seconds = cache_seconds
+        self.text = ""
+        self.rendered_at: Optional[float] = None
+        self.lock = asyncio.Lock()
+
+    async def render(self) -> str:
+        async with self.lock:
+            now = time.monotonic()
+            if self.rendered_at is None or now - self.rendered_at >= self.cache_seconds:
+                self.text = render_openmetrics(await self.metrics.get_metrics())
+                self.rendered_at = now
+            return self.text
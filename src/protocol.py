@@ -1,9 +1,48 @@
+import functools
 import struct
+from typing import Iterator, NamedTuple
 
 from src.config import config
 
+# Protocol versions. Version 1 is the legacy bare length prefix; version 2
+# adds a header carrying a request ID so several requests can be in flight
+# on one connection and answered out of order.
+PROTOCOL_V1 = 1
+PROTOCOL_V2 = 2
 
-class Protocol:
+# Version 2 response status codes
+STATUS_OK = 0
+STATUS_ERROR = 1
+# Shed by admission control without running inference, may be retried
+STATUS_OVERLOADED = 2
+# Payload could not be decoded: unknown codec, corrupt or too large
+STATUS_BAD_FRAME = 3
+
+# Version 2 flags. The header's codec byte names the compression codec
+# (see src/compression.py) that FLAG_COMPRESSED payloads use and that
+# FLAG_ACCEPT_COMPRESSED requests accept for their response.
+FLAG_COMPRESSED = 0x01
+FLAG_ACCEPT_COMPRESSED = 0x02
+
+
+class FrameHeader(NamedTuple):
+    version: int
+    flags: int
+    status: int
+    codec: int
+    request_id: int
+    length: int
+
+
+class FrameCodec:
+    """Frame encoding bound to one length field size.
+
+    All structs are compiled once at construction, so packing and
+    unpacking do no format lookups or config reads. Besides whole frames
+    it can pack into preallocated buffers (`pack_into`) and pack a batch
+    of messages into one buffer (`pack_many`); `FrameParser` splits a
+    byte stream into frames with it.
+    """
 
     _size_formats = {
         2: "H",  # 2-byte unsigned short
@@ -11,35 +50,224 @@ class Protocol:
         8: "Q",  # 8-byte unsigned long long
     }
 
-    @classmethod
-    def pack_message(cls, payload: bytes) -> bytes:
+    # Version 2 header, followed by the length field:
+    # version (1) | flags (1) | status (1) | codec (1) | request_id (4)
+    _v2_prefix_format = ">BBBBI"
+
+    def __init__(self, length_field_size: int):
+        fmt_char = self._size_formats.get(length_field_size)
+        if not fmt_char:
+            raise ValueError(f"Unsupported length field size: {length_field_size}")
+
+        self.length_field_size = length_field_size
+        self.length_struct = struct.Struct(f">{fmt_char}")
+        self.v2_struct = struct.Struct(f"{self._v2_prefix_format}{fmt_char}")
+
+    def header_size(self, version: int = PROTOCOL_V1) -> int:
+        """Size of the frame header preceding the payload."""
+        if version == PROTOCOL_V1:
+            return self.length_struct.size
+        return self.v2_struct.size
+
+    # Version 1
+
+    def pack_length(self, length: int) -> bytes:
+        """Big-endian length prefix, sent on its own ahead of the payload."""
+        return self.length_struct.pack(length)
+
+    def pack_message(self, payload: bytes) -> bytes:
         """Prefix payload with big-endian length."""
-        if not isinstance(payload, (bytes, bytearray)):
+        if not isinstance(payload, (bytes, bytearray, memoryview)):
             raise TypeError("Payload must be bytes")
+        return self.length_struct.pack(len(payload)) + payload
 
-        fmt_char = cls._size_formats.get(config.length_field_size)
-        if not fmt_char:
-            raise ValueError(
-                f"Unsupported length field size: {config.length_field_size}"
-            )
+    def pack_into(self, buffer, offset: int, payload: bytes) -> int:
+        """Write a length-prefixed message at `offset`, returning the offset
+        just past it."""
+        self.length_struct.pack_into(buffer, offset, len(payload))
+        start = offset + self.length_struct.size
+        end = start + len(payload)
+        buffer[start:end] = payload
+        return end
 
-        return struct.pack(f">{fmt_char}", len(payload)) + payload
+    def pack_many(self, payloads: list[bytes]) -> bytes:
+        """Length-prefixed messages packed back to back into one buffer."""
+        pack = self.length_struct.pack
+        parts = []
+        for payload in payloads:
+            parts.append(pack(len(payload)))
+            parts.append(payload)
+        return b"".join(parts)
 
-    @classmethod
-    def unpack_length(cls, length_bytes: bytes) -> int:
+    def unpack_length(self, length_bytes: bytes) -> int:
         """Unpack big-endian length."""
-        if len(length_bytes) != config.length_field_size:
+        if len(length_bytes) != self.length_struct.size:
             raise ValueError(
-                f"Length prefix must be exactly {config.length_field_size} bytes"
+                f"Length prefix must be exactly {self.length_struct.size} bytes"
             )
+        return self.length_struct.unpack(length_bytes)[0]
 
-        fmt_char = cls._size_formats.get(config.length_field_size)
-        if not fmt_char:
+    # Version 2
+
+    def pack_frame_header(
+        self,
+        request_id: int,
+        length: int,
+        flags: int = 0,
+        status: int = 0,
+        codec: int = 0,
+    ) -> bytes:
+        """Version 2 header, sent on its own ahead of the payload."""
+        return self.v2_struct.pack(
+            PROTOCOL_V2, flags, status, codec, request_id, length
+        )
+
+    def pack_frame(
+        self,
+        request_id: int,
+        payload: bytes,
+        flags: int = 0,
+        status: int = 0,
+        codec: int = 0,
+    ) -> bytes:
+        """Prefix payload with a version 2 header."""
+        if not isinstance(payload, (bytes, bytearray, memoryview)):
+            raise TypeError("Payload must be bytes")
+        return (
+            self.v2_struct.pack(
+                PROTOCOL_V2, flags, status, codec, request_id, len(payload)
+            )
+            + payload
+        )
+
+    def unpack_header(self, header_bytes: bytes) -> FrameHeader:
+        """Unpack a version 2 header."""
+        if len(header_bytes) != self.v2_struct.size:
             raise ValueError(
-                f"Unsupported length field size: {config.length_field_size}"
+                f"Frame header must be exactly {self.v2_struct.size} bytes"
             )
 
+        header = FrameHeader._make(self.v2_struct.unpack(header_bytes))
+        if header.version != PROTOCOL_V2:
+            raise ValueError(f"Unsupported protocol version: {header.version}")
+        return header
+
+
+class FrameParser:
+    """Incremental splitter of a byte stream into frames.
+
+    `feed` accepts chunks of any size and yields each complete frame as a
+    `memoryview` of the payload (version 1) or a `(FrameHeader, memoryview)`
+    pair (version 2). Consume the frames of one `feed` before the next;
+    the views point into a buffer that is not reused, so they remain
+    readable, but copying them avoids pinning it.
+    """
+
+    def __init__(self, codec: FrameCodec, version: int = PROTOCOL_V1):
+        self.codec = codec
+        self.version = version
+        self.header_size = codec.header_size(version)
+        self.buffer = bytearray()
+        self.start = 0
+
+    def feed(self, chunk: bytes) -> Iterator:
+        """Add `chunk` and iterate over the frames completed so far"""
+        if self.start:
+            # Copy the unconsumed tail so views handed out earlier stay intact
+            self.buffer = self.buffer[self.start :]
+            self.start = 0
         try:
-            return struct.unpack(f">{fmt_char}", length_bytes)[0]
-        except struct.error:
-            raise ValueError(f"Invalid length prefix: {length_bytes.hex()}")
+            self.buffer += chunk
+        except BufferError:
+            # A view of an unfinished iteration still pins the buffer
+            self.buffer = self.buffer + chunk
+        return self._frames()
+
+    def _frames(self) -> Iterator:
+        buffer = self.buffer
+        view = memoryview(buffer)
+        end = len(buffer)
+        header_size = self.header_size
+        v1 = self.version == PROTOCOL_V1
+        unpack_from = (
+            self.codec.length_struct if v1 else self.codec.v2_struct
+        ).unpack_from
+
+        while end - self.start >= header_size:
+            fields = unpack_from(buffer, self.start)
+            if not v1 and fields[0] != PROTOCOL_V2:
+                raise ValueError(f"Unsupported protocol version: {fields[0]}")
+            length = fields[-1]
+            payload_start = self.start + header_size
+            if end < payload_start + length:
+                return
+
+            self.start = payload_start + length
+            payload = view[payload_start : self.start]
+            if v1:
+                yield payload
+                continue
+
+            yield FrameHeader._make(fields), payload
+
+    def pending(self) -> int:
+        """Bytes received but not yet returned as part of a frame"""
+        return len(self.buffer) - self.start
+
+
+@functools.cache
+def default_codec(length_field_size: int) -> FrameCodec:
+    return FrameCodec(length_field_size)
+
+
+class Protocol:
+    """Class-level access to a `FrameCodec` for `config.length_field_size`.
+
+    Kept for existing callers; new code should hold a `FrameCodec`.
+    """
+
+    @classmethod
+    def _codec(cls) -> FrameCodec:
+        return default_codec(config.length_field_size)
+
+    @classmethod
+    def pack_message(cls, payload: bytes) -> bytes:
+        return cls._codec().pack_message(payload)
+
+    @classmethod
+    def pack_length(cls, length: int) -> bytes:
+        return cls._codec().pack_length(length)
+
+    @classmethod
+    def unpack_length(cls, length_bytes: bytes) -> int:
+        return cls._codec().unpack_length(length_bytes)
+
+    @classmethod
+    def header_size(cls, version: int = PROTOCOL_V1) -> int:
+        return cls._codec().header_size(version)
+
+    @classmethod
+    def pack_frame(
+        cls,
+        request_id: int,
+        payload: bytes,
+        flags: int = 0,
+        status: int = 0,
+        codec: int = 0,
+    ) -> bytes:
+        return cls._codec().pack_frame(request_id, payload, flags, status, codec)
+
+    @classmethod
+    def pack_frame_header(
+        cls,
+        request_id: int,
+        length: int,
+        flags: int = 0,
+        status: int = 0,
+        codec: int = 0,
+    ) -> bytes:
+        return cls._codec().pack_frame_header(request_id, length, flags, status, codec)
+
+    @classmethod
+    def unpack_header(cls, header_bytes: bytes) -> FrameHeader:
+        return cls._codec().unpack_header(header_bytes)
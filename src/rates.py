@@ -0,0 +1,73 @@
+import time
+
+# Windows reported alongside lifetime totals, in seconds
+RATE_WINDOWS = (1, 10, 60, 300)
+
+
+class WindowedCounter:
+    """Per-second event counts in a ring covering `horizon` seconds.
+
+    Backed by int64 slots (slot 0 holds the last second written, the rest
+    are the ring) so it can live in shared memory next to the metrics
+    counters. Adding is O(1); reading a window is O(window) and needs no
+    writes, so another process can read it safely.
+    """
+
+    def __init__(self, slots: memoryview, horizon: int):
+        self.slots = slots
+        # One spare bucket for the second currently being filled
+        self.size = horizon + 1
+
+    @staticmethod
+    def slots_needed(horizon: int) -> int:
+        return horizon + 2
+
+    def add(self):
+        second = int(time.monotonic())
+        if second != self.slots[0]:
+            self._advance(second)
+        self.slots[1 + second % self.size] += 1
+
+    def _advance(self, second: int):
+        # Clear buckets for the seconds skipped since the last event
+        for skipped in range(
+            max(self.slots[0] + 1, second - self.size + 1), second + 1
+        ):
+            self.slots[1 + skipped % self.size] = 0
+        self.slots[0] = second
+
+    def count(self, window: int, now: int) -> int:
+        """Events in the `window` complete seconds before second `now`"""
+        last = self.slots[0]
+        total = 0
+        for second in range(
+            max(now - window, last - self.size + 1), min(now, last + 1)
+        ):
+            total += self.slots[1 + second % self.size]
+        return total
+
+
+def windowed_rates(counters: dict[str, list[WindowedCounter]]) -> dict:
+    """Per-second rates and error ratios per window, summed over counters.
+
+    `counters` maps "requests", "errors" and "inference_errors" to the
+    counters to sum (one per worker in a cluster).
+    """
+    now = int(time.monotonic())
+    rates = {}
+    for window in RATE_WINDOWS:
+        counts = {
+            name: sum(counter.count(window, now) for counter in group)
+            for name, group in counters.items()
+        }
+        requests = counts["requests"]
+        rates[f"{window}s"] = {
+            "requests_per_second": requests / window,
+            "errors_per_second": counts["errors"] / window,
+            "inference_errors_per_second": counts["inference_errors"] / window,
+            "error_rate": counts["errors"] / requests if requests else 0,
+            "inference_error_rate": (
+                counts["inference_errors"] / requests if requests else 0
+            ),
+        }
+    return rates
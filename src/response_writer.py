@@ -0,0 +1,61 @@
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class ResponseWriter:
+    """Per-connection response path on top of a StreamWriter-like object.
+
+    Headers and payloads are handed to the transport as separate buffers
+    with `writelines`, so they are sent with one scatter-gather call
+    instead of being concatenated first. With `coalesce` set, responses
+    completed in the same event loop iteration are collected and flushed
+    together by a single `writelines` at the end of the iteration.
+
+    `drain` only waits for the peer once the bytes buffered for the
+    connection exceed `high_water`.
+    """
+
+    def __init__(self, writer, high_water: int, coalesce: bool = False):
+        self.writer = writer
+        self.transport: asyncio.WriteTransport = writer.transport
+        self.high_water = high_water
+        self.coalesce = coalesce
+        self.parts: list[bytes] = []
+        self.pending = 0
+        self.flush_handle: asyncio.Handle | None = None
+        # Pause writing, and so block drain, from the same mark
+        self.transport.set_write_buffer_limits(high=high_water)
+
+    def send(self, header: bytes, payload: bytes):
+        if not self.coalesce:
+            self.writer.writelines((header, payload))
+            return
+        self.parts.append(header)
+        self.parts.append(payload)
+        self.pending += len(header) + len(payload)
+        if self.flush_handle is None:
+            self.flush_handle = asyncio.get_running_loop().call_soon(self.flush)
+
+    def flush(self):
+        if self.flush_handle:
+            self.flush_handle.cancel()
+            self.flush_handle = None
+        if not self.parts:
+            return
+        parts, self.parts, self.pending = self.parts, [], 0
+        if self.transport.is_closing():
+            return
+        self.writer.writelines(parts)
+
+    def buffered(self) -> int:
+        return self.pending + self.transport.get_write_buffer_size()
+
+    async def drain(self):
+        if self.transport.is_closing():
+            raise ConnectionResetError("Connection lost")
+        if self.buffered() <= self.high_water:
+            return
+        self.flush()
+        await self.writer.drain()
@@ -0,0 +1,124 @@
+import asyncio
+import logging
+import multiprocessing
+import signal
+from multiprocessing.process import BaseProcess
+
+from src.cluster import ClusterMetrics, ClusterState, GlobalConnectionLimiter
+from src.config import config
+
+logger = logging.getLogger(__name__)
+
+
+def run_worker(worker: int, state: ClusterState):
+    """Entry point of a worker process"""
+    asyncio.run(_worker_main(worker, state))
+
+
+async def _worker_main(worker: int, state: ClusterState):
+    # Imported here so the supervisor does not load the model
+    from src.core import setup_tcp_server
+    from src.logging import setup_logging
+    from src.metrics_v2 import Metrics
+
+    setup_logging(config.log_level)
+
+    main_task = asyncio.current_task()
+    loop = asyncio.get_running_loop()
+    loop.add_signal_handler(signal.SIGTERM, main_task.cancel)
+    loop.add_signal_handler(signal.SIGINT, main_task.cancel)
+
+    # Counters are incremented straight into this worker's shared memory row
+    metrics = Metrics(counters=state.worker_counters(worker))
+    await metrics.start()
+
+    tcp_server = setup_tcp_server(
+        metrics,
+        reuse_port=True,
+        connection_limiter=GlobalConnectionLimiter(state, worker),
+    )
+    try:
+        await tcp_server.startup()
+        logger.info("Worker %d serving", worker)
+        async with tcp_server.server:
+            await tcp_server.server.serve_forever()
+    except asyncio.CancelledError:
+        await tcp_server.shutdown()
+        logger.info("Worker %d stopped", worker)
+    finally:
+        await metrics.stop()
+
+
+class Supervisor:
+    """Runs N worker processes that share the TCP port via SO_REUSEPORT.
+
+    Each worker runs its own event loop and `TCP_Server`. Workers that
+    exit unexpectedly are restarted; their counters are folded into the
+    cluster totals so `/metrics` stays monotonic.
+    """
+
+    def __init__(self, workers: int, restart_delay: float = 1.0):
+        self.workers = workers
+        self.restart_delay = restart_delay
+        self.ctx = multiprocessing.get_context("spawn")
+        self.state = ClusterState(workers, config.max_connections, self.ctx)
+        self.metrics = ClusterMetrics(self.state)
+        self.processes: list[BaseProcess | None] = [None] * workers
+        self.running = False
+
+    def start(self):
+        self.running = True
+        for worker in range(self.workers):
+            self._spawn(worker)
+        logger.info("Supervisor started %d workers", self.workers)
+
+    async def monitor(self):
+        """Restart workers that exit while the supervisor is running"""
+        while self.running:
+            for worker, process in enumerate(self.processes):
+                if process is None or process.is_alive():
+                    continue
+
+                logger.error(
+                    "Worker %d (pid %s) exited with code %s, restarting",
+                    worker,
+                    process.pid,
+                    process.exitcode,
+                )
+                process.join()
+                self.metrics.retire(worker)
+                self.metrics.worker_info[worker]["alive"] = False
+                self.metrics.worker_info[worker]["restarts"] += 1
+                self.processes[worker] = None
+                asyncio.get_running_loop().call_later(
+                    self.restart_delay, self._respawn, worker
+                )
+            await asyncio.sleep(0.5)
+
+    def stop(self, timeout: float = 10.0):
+        self.running = False
+        for process in self.processes:
+            if process and process.is_alive():
+                process.terminate()
+        for process in self.processes:
+            if process:
+                process.join(timeout)
+                if process.is_alive():
+                    process.kill()
+        logger.info("Supervisor stopped")
+
+    def _respawn(self, worker: int):
+        if self.running:
+            self._spawn(worker)
+
+    def _spawn(self, worker: int):
+        process = self.ctx.Process(
+            target=run_worker,
+            args=(worker, self.state),
+            name=f"tcp-worker-{worker}",
+        )
+        process.start()
+        self.processes[worker] = process
+        self.metrics.worker_info[worker]["pid"] = process.pid
+        self.metrics.worker_info[worker]["alive"] = True
+        logger.info("Worker %d started (pid %d)", worker, process.pid)
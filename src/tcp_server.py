@@ -1,14 +1,54 @@
 import asyncio
 import logging
+import time
+import zlib
+from typing import Optional
+from typing import Protocol as TypingProtocol
 from typing import Set
 
-from src.metrics_v2 import Metrics
+from src.admission import AcceptThrottle, AdaptiveConcurrencyLimit, Overloaded
+from src.batching import BatchScheduler
+from src.buffered_transport import FrameProtocol
+from src.cache import InferenceCache, payload_key
+from src.coalescing import RequestCoalescer
+from src.compression import PayloadCompression
+from src.inference import InferenceExecutor
+from src.metrics_v2 import (
+    STAGE_HEADER_READ,
+    STAGE_INFERENCE,
+    STAGE_PACK,
+    STAGE_PAYLOAD_READ,
+    STAGE_WRITE,
+    Metrics,
+)
 from src.ml_interface import ML_Interface
-from src.protocol import Protocol
+from src.protocol import (
+    FLAG_ACCEPT_COMPRESSED,
+    FLAG_COMPRESSED,
+    PROTOCOL_V1,
+    PROTOCOL_V2,
+    STATUS_BAD_FRAME,
+    STATUS_ERROR,
+    STATUS_OK,
+    STATUS_OVERLOADED,
+    FrameCodec,
+    FrameHeader,
+)
+from src.response_writer import ResponseWriter
 
 logger = logging.getLogger(__name__)
 
 
+class BadFrame(Exception):
+    """Raised for version 2 frames whose payload cannot be decoded"""
+
+
+class ConnectionLimiter(TypingProtocol):
+    def try_acquire(self) -> bool: ...
+
+    def release(self): ...
+
+
 class TCP_Server:
     def __init__(
         self,
@@ -19,13 +59,27 @@ class TCP_Server:
         max_connections: int,
         max_payload_size: int,
         payload_timeout_seconds: int,
-        protocol: Protocol,
+        protocol: FrameCodec,
         ml_interface: ML_Interface,
         metrics: Metrics,
+        executor: Optional[InferenceExecutor] = None,
+        batcher: Optional[BatchScheduler] = None,
+        protocol_version: int = PROTOCOL_V1,
+        max_in_flight: int = 1,
+        transport: str = "stream",
+        reuse_port: bool = False,
+        connection_limiter: Optional[ConnectionLimiter] = None,
+        cache: Optional[InferenceCache] = None,
+        coalescer: Optional[RequestCoalescer] = None,
+        admission: Optional[AdaptiveConcurrencyLimit] = None,
+        accept_throttle: Optional[AcceptThrottle] = None,
+        write_high_water: int = 64 * 1024,
+        write_coalescing: bool = True,
+        compression: Optional[PayloadCompression] = None,
     ):
         self.host: str = host
         self.port: int = port
-        self.protocol: Protocol = protocol
+        self.protocol: FrameCodec = protocol
         self.ml_interface: ML_Interface = ml_interface
         self.length_field_size: int = length_field_size
         self.response_size: int = response_size
@@ -36,15 +90,42 @@ class TCP_Server:
         self.max_payload_size: int = max_payload_size
         self.payload_timeout_seconds: int = payload_timeout_seconds
         self.metrics = metrics
+        self.executor = executor or InferenceExecutor(ml_interface)
+        self.batcher = batcher
+        self.protocol_version: int = protocol_version
+        self.max_in_flight: int = max_in_flight
+        self.transport: str = transport
+        self.reuse_port: bool = reuse_port
+        self.connection_limiter = connection_limiter
+        self.cache = cache
+        self.coalescer = coalescer
+        self.admission = admission
+        self.accept_throttle = accept_throttle
+        self.write_high_water: int = write_high_water
+        self.write_coalescing: bool = write_coalescing
+        self.compression = compression
 
     async def startup(self):
-        self.server = await asyncio.start_server(
-            self.handle_client,
-            self.host,
-            self.port,
-            limit=self.max_payload_size,
-            backlog=50,
-        )
+        self.executor.start()
+        if self.batcher:
+            await self.batcher.start()
+        if self.transport == "buffered":
+            self.server = await asyncio.get_running_loop().create_server(
+                lambda: FrameProtocol(self),
+                self.host,
+                self.port,
+                backlog=50,
+                reuse_port=self.reuse_port or None,
+            )
+        else:
+            self.server = await asyncio.start_server(
+                self.handle_client,
+                self.host,
+                self.port,
+                limit=self.max_payload_size,
+                backlog=50,
+                reuse_port=self.reuse_port or None,
+            )
         logger.info(f"Server started on {self.host}:{self.port}")
 
     async def shutdown(self):
@@ -63,6 +144,10 @@ class TCP_Server:
             self.server.close()
             await self.server.wait_closed()
 
+        if self.batcher:
+            await self.batcher.stop()
+        self.executor.shutdown()
+
         logger.info("Server shutdown complete")
 
     async def handle_client(
@@ -70,21 +155,15 @@ class TCP_Server:
     ):
         peer = writer.get_extra_info("peername")
 
-        await self._accept_connection(writer)
+        if not await self._accept_connection(writer):
+            return
 
+        responses = self._response_writer(writer)
         try:
-            while self.running:
-                payload = await self._read_payload(reader, peer)
-                if not payload:
-                    continue
-
-                # Process with ML model
-                response = await self._process_payload(payload, writer, peer)
-                if not response:
-                    continue
-
-                await writer.drain()
-                self.metrics.add_request()
+            if self.protocol_version == PROTOCOL_V2:
+                await self._handle_multiplexed(reader, responses, peer)
+            else:
+                await self._handle_sequential(reader, responses, peer)
 
         except asyncio.IncompleteReadError:
             logger.info("Client %s disconnected", peer)
@@ -92,42 +171,154 @@ class TCP_Server:
             logger.error("Error handling %s: %s", peer, e)
             self.metrics.add_error()
         finally:
+            responses.flush()
             await self._cleanup_connection(writer, peer)
 
-    async def _accept_connection(self, writer: asyncio.StreamWriter):
-        peer = writer.get_extra_info("peername")
+    def _response_writer(self, writer) -> ResponseWriter:
+        # Only multiplexed connections can have several responses ready at once
+        return ResponseWriter(
+            writer,
+            high_water=self.write_high_water,
+            coalesce=self.write_coalescing and self.protocol_version == PROTOCOL_V2,
+        )
 
-        # Check connection limit
-        if len(self.active_connections) >= self.max_connections:
-            logger.warning("Connection limit reached, rejecting %s", peer)
+    async def _handle_sequential(
+        self,
+        reader: asyncio.StreamReader,
+        writer: ResponseWriter,
+        peer: tuple[str, int],
+    ):
+        """Legacy framing: one request in flight, answered in order"""
+        while self.running:
+            payload = await self._read_payload(reader, peer)
+            if not payload:
+                continue
+
+            # Process with ML model
+            if await self._process_payload(payload, writer, peer):
+                self.metrics.add_request()
+
+    async def _handle_multiplexed(
+        self,
+        reader: asyncio.StreamReader,
+        writer: ResponseWriter,
+        peer: tuple[str, int],
+    ):
+        """Version 2 framing: keep reading while up to `max_in_flight`
+        requests are processed concurrently, each response written as soon
+        as it completes and matched to its request by ID"""
+        in_flight = asyncio.Semaphore(self.max_in_flight)
+        tasks: Set[asyncio.Task] = set()
+
+        def request_done(task: asyncio.Task):
+            tasks.discard(task)
+            in_flight.release()
+
+        try:
+            while self.running:
+                await in_flight.acquire()
+                try:
+                    frame = await self._read_frame(reader, peer)
+                except BaseException:
+                    in_flight.release()
+                    raise
+                if frame is None:
+                    in_flight.release()
+                    continue
+
+                header, payload = frame
+                task = asyncio.create_task(
+                    self._process_frame(header, payload, writer, peer)
+                )
+                tasks.add(task)
+                task.add_done_callback(request_done)
+
+        except asyncio.IncompleteReadError as e:
+            # Clean EOF between frames: answer what is already in flight
+            if not e.partial and tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+        finally:
+            for task in tasks.copy():
+                task.cancel()
+
+    async def _accept_connection(self, writer: asyncio.StreamWriter) -> bool:
+        if not self._register_connection(writer):
             writer.close()
             await writer.wait_closed()
-            return
+            return False
+        return True
+
+    def _register_connection(self, writer: asyncio.StreamWriter) -> bool:
+        peer = writer.get_extra_info("peername")
+
+        if self.accept_throttle and not self.accept_throttle.try_acquire(
+            len(self.active_connections)
+        ):
+            logger.warning("Near connection limit, throttling %s", peer)
+            return False
+
+        # Check connection limit, shared across processes when a limiter is set
+        if self.connection_limiter:
+            accepted = self.connection_limiter.try_acquire()
+        else:
+            accepted = len(self.active_connections) < self.max_connections
+        if not accepted:
+            logger.warning("Connection limit reached, rejecting %s", peer)
+            return False
 
         self.active_connections.add(writer)
         logger.info(
             "Peer %s connected (active: %d)", peer, len(self.active_connections)
         )
         self.metrics.add_connection()
+        return True
 
     async def _read_payload(self, reader: asyncio.StreamReader, peer: tuple[str, int]):
+        # Header read time includes waiting for the client's next request
+        started = time.perf_counter_ns()
         try:
             length_bytes = await asyncio.wait_for(
-                reader.readexactly(self.length_field_size),
+                reader.readexactly(self.protocol.header_size(PROTOCOL_V1)),
                 timeout=self.payload_timeout_seconds,
             )
         except asyncio.TimeoutError:
             logger.warning("Timeout reading from %s", peer)
             self.metrics.add_error()
             return None
+        self.metrics.record_stage(STAGE_HEADER_READ, started, time.perf_counter_ns())
 
         payload_len = self.protocol.unpack_length(length_bytes)
+        return await self._read_body(reader, payload_len, peer)
 
+    async def _read_frame(self, reader: asyncio.StreamReader, peer: tuple[str, int]):
+        started = time.perf_counter_ns()
+        try:
+            header_bytes = await asyncio.wait_for(
+                reader.readexactly(self.protocol.header_size(PROTOCOL_V2)),
+                timeout=self.payload_timeout_seconds,
+            )
+        except asyncio.TimeoutError:
+            logger.warning("Timeout reading from %s", peer)
+            self.metrics.add_error()
+            return None
+        self.metrics.record_stage(STAGE_HEADER_READ, started, time.perf_counter_ns())
+
+        header = self.protocol.unpack_header(header_bytes)
+        payload = await self._read_body(reader, header.length, peer)
+        if not payload:
+            return None
+        return header, payload
+
+    async def _read_body(
+        self, reader: asyncio.StreamReader, payload_len: int, peer: tuple[str, int]
+    ):
         if payload_len > self.max_payload_size:
             logger.error("Payload too large from %s: %d bytes", peer, payload_len)
             self.metrics.add_error()
             return None
 
+        started = time.perf_counter_ns()
         try:
             payload = await asyncio.wait_for(
                 reader.readexactly(payload_len),
@@ -137,29 +328,147 @@ class TCP_Server:
             logger.warning("Timeout reading payload from %s", peer)
             self.metrics.add_error()
             return None
+        self.metrics.record_stage(STAGE_PAYLOAD_READ, started, time.perf_counter_ns())
 
         logger.debug("Received %d bytes from %s", payload_len, peer)
         return payload
 
+    async def _run_inference(self, payload: bytes) -> bytes:
+        started = time.perf_counter_ns()
+        key = None
+        if self.cache or self.coalescer:
+            key = payload_key(payload)
+        if self.cache:
+            response = self.cache.get(key)
+            if response is not None:
+                return response
+
+        if self.coalescer:
+            response = await self.coalescer.run(
+                key, lambda: self._compute(payload, key)
+            )
+        else:
+            response = await self._compute(payload, key)
+        self.metrics.record_stage(STAGE_INFERENCE, started, time.perf_counter_ns())
+        return response
+
+    async def _compute(self, payload: bytes, key: Optional[bytes]) -> bytes:
+        if self.admission and not self.admission.try_acquire():
+            raise Overloaded()
+
+        started = time.perf_counter_ns()
+        try:
+            if self.batcher:
+                response = await self.batcher.submit(payload)
+            else:
+                response = await self.executor.run(payload)
+        finally:
+            if self.admission:
+                self.admission.release(started, time.perf_counter_ns())
+        if self.cache:
+            self.cache.put(key, response)
+        return response
+
     async def _process_payload(
-        self, payload: bytes, writer: asyncio.StreamWriter, peer: tuple[str, int]
-    ):
+        self, payload: bytes, writer: ResponseWriter, peer: tuple[str, int]
+    ) -> bool:
+        """Answer a version 1 request, returning whether it succeeded"""
         try:
-            response = self.ml_interface.run_inference(payload)
-            response = self.protocol.pack_message(response)
-            writer.write(response)
+            response = await self._run_inference(payload)
+            pack_started = time.perf_counter_ns()
+            header = self.protocol.pack_length(len(response))
+            write_started = time.perf_counter_ns()
+            self.metrics.record_stage(STAGE_PACK, pack_started, write_started)
+            writer.send(header, response)
+            await writer.drain()
+            self.metrics.record_stage(
+                STAGE_WRITE, write_started, time.perf_counter_ns()
+            )
+            logger.debug("Sent %d bytes to %s", len(header) + len(response), peer)
+        except Overloaded:
+            # Version 1 has no status field; an empty response means overloaded
+            logger.debug("Overloaded, shedding request from %s", peer)
+            writer.send(self.protocol.pack_length(0), b"")
             await writer.drain()
-            logger.debug("Sent %d bytes to %s", len(response), peer)
+            return False
         except Exception as e:
             logger.error("ML inference error for %s: %s", peer, e)
             self.metrics.add_inference_error()
-            return None
-        return response
+            return False
+        return True
+
+    async def _process_frame(
+        self,
+        header: FrameHeader,
+        payload: bytes,
+        writer: ResponseWriter,
+        peer: tuple[str, int],
+    ):
+        flags = 0
+        try:
+            if header.flags & FLAG_COMPRESSED:
+                payload = self._decompress(header, payload)
+            response = await self._run_inference(payload)
+            status = STATUS_OK
+            if header.flags & FLAG_ACCEPT_COMPRESSED and self.compression:
+                compressed = self.compression.compress(header.codec, response)
+                if compressed is not None:
+                    response = compressed
+                    flags = FLAG_COMPRESSED
+        except BadFrame as e:
+            logger.warning("Bad frame from %s: %s", peer, e)
+            self.metrics.add_error()
+            response = b""
+            status = STATUS_BAD_FRAME
+        except Overloaded:
+            logger.debug("Overloaded, shedding request from %s", peer)
+            response = b""
+            status = STATUS_OVERLOADED
+        except Exception as e:
+            logger.error("ML inference error for %s: %s", peer, e)
+            self.metrics.add_inference_error()
+            response = b""
+            status = STATUS_ERROR
+
+        try:
+            pack_started = time.perf_counter_ns()
+            frame_header = self.protocol.pack_frame_header(
+                header.request_id,
+                len(response),
+                flags=flags,
+                status=status,
+                codec=header.codec if flags else 0,
+            )
+            write_started = time.perf_counter_ns()
+            self.metrics.record_stage(STAGE_PACK, pack_started, write_started)
+            writer.send(frame_header, response)
+            await writer.drain()
+            self.metrics.record_stage(
+                STAGE_WRITE, write_started, time.perf_counter_ns()
+            )
+            logger.debug("Sent %d bytes to %s", len(frame_header) + len(response), peer)
+        except Exception as e:
+            logger.error("Error writing response to %s: %s", peer, e)
+            self.metrics.add_error()
+            return
+
+        if status == STATUS_OK:
+            self.metrics.add_request()
+
+    def _decompress(self, header: FrameHeader, payload: bytes) -> bytes:
+        if not self.compression:
+            raise BadFrame("compression is not enabled")
+        try:
+            return self.compression.decompress(header.codec, payload)
+        except (ValueError, zlib.error) as e:
+            raise BadFrame(str(e)) from e
 
     async def _cleanup_connection(
         self, writer: asyncio.StreamWriter, peer: tuple[str, int]
     ):
         self.active_connections.discard(writer)
+        if self.connection_limiter:
+            self.connection_limiter.release()
         writer.close()
         try:
             await writer.wait_closed()
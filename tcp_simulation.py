@@ -2,33 +2,41 @@ import asyncio
 import os
 
 from src.config import config
-from src.protocol import Protocol
+from src.protocol import FrameCodec, FrameParser
 
 HOST = "127.0.0.1"
 PORT = 9000
 INTERVAL = 0.333
 NUM_CLIENTS = 5
 
+CODEC = FrameCodec(config.length_field_size)
+
 
 async def client_task(id: int):
     count = id * 10
     reader, writer = await asyncio.open_connection(HOST, PORT)
+    parser = FrameParser(CODEC)
 
     while count > 0:
 
         payload = os.urandom(128)
 
-        writer.write(Protocol.pack_message(payload))
+        writer.write(CODEC.pack_message(payload))
         await writer.drain()
 
-        length_bytes = await reader.readexactly(config.length_field_size)
-        payload_length = Protocol.unpack_length(length_bytes)
+        # Responses may arrive split across reads
+        responses = []
+        while not responses:
+            chunk = await reader.read(64 * 1024)
+            if not chunk:
+                return
+            responses = [bytes(frame) for frame in parser.feed(chunk)]
 
-        response_bytes = await reader.readexactly(payload_length)
-        print(f"Client {id} received response: {response_bytes.decode('ascii')}")
+        for response_bytes in responses:
+            print(f"Client {id} received response: {response_bytes.decode('ascii')}")
 
         await asyncio.sleep(INTERVAL)
-        count -= 1
+        count -= len(responses)
 
 
 async def main():
@@ -1,4 +1,6 @@
+import asyncio
 import random
+import time
 from typing import override
 
 import pytest_asyncio
@@ -6,7 +8,7 @@ import pytest_asyncio
 from src.config import config
 from src.metrics_v2 import Metrics
 from src.ml_interface_abstract import ML_Interface_Abstract
-from src.protocol import Protocol
+from src.protocol import FrameCodec
 from src.tcp_server import TCP_Server
 
 HOST = "127.0.0.1"
@@ -42,10 +44,74 @@ class MockMLInterfaceWithException(ML_Interface_Abstract):
         raise InferenceException("Inference failed")
 
 
-@pytest_asyncio.fixture(scope="function")
-async def tcp_server():
-    metrics = Metrics()
-    server = TCP_Server(
+class EchoMLInterface(ML_Interface_Abstract):
+    """Echoes payloads back and records the size of every batch it runs"""
+
+    def __init__(self):
+        self.batch_sizes = []
+
+    @override
+    def run_inference(self, payload: bytes) -> bytes:
+        return payload
+
+    @override
+    async def async_run_inference(self, payload: bytes) -> bytes:
+        return payload
+
+    @override
+    def run_batch_inference(self, payloads: list[bytes]) -> list[bytes]:
+        self.batch_sizes.append(len(payloads))
+        return list(payloads)
+
+
+class CountingMLInterface(ML_Interface_Abstract):
+    """Reverses payloads and counts how often the model actually runs"""
+
+    def __init__(self):
+        self.calls = 0
+
+    @override
+    def run_inference(self, payload: bytes) -> bytes:
+        self.calls += 1
+        return bytes(payload[::-1])
+
+
+class BlockingMLInterface(ML_Interface_Abstract):
+    """Sync-only model that blocks the calling thread on every request"""
+
+    def __init__(self, delay: float = 0.1):
+        self.delay = delay
+
+    @override
+    def run_inference(self, payload: bytes) -> bytes:
+        time.sleep(self.delay)
+        return payload[::-1]
+
+
+class DelayMLInterface(ML_Interface_Abstract):
+    """Async model that sleeps payload[0] milliseconds, tracking concurrency"""
+
+    def __init__(self):
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    @override
+    def run_inference(self, payload: bytes) -> bytes:
+        return payload
+
+    @override
+    async def async_run_inference(self, payload: bytes) -> bytes:
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(payload[0] / 1000)
+        finally:
+            self.in_flight -= 1
+        return payload
+
+
+def build_tcp_server(ml_interface: ML_Interface_Abstract, metrics: Metrics, **kwargs):
+    return TCP_Server(
         host=HOST,
         port=PORT,
         length_field_size=config.length_field_size,
@@ -53,10 +119,17 @@ async def tcp_server():
         max_connections=config.max_connections,
         max_payload_size=config.max_payload_size_kb * 1024,
         payload_timeout_seconds=config.payload_timeout_seconds,
-        protocol=Protocol(),
-        ml_interface=MockMLInterface(),
+        protocol=FrameCodec(config.length_field_size),
+        ml_interface=ml_interface,
         metrics=metrics,
+        **kwargs,
     )
+
+
+@pytest_asyncio.fixture(scope="function")
+async def tcp_server():
+    metrics = Metrics()
+    server = build_tcp_server(MockMLInterface(), metrics)
     await server.startup()
     yield server
     await server.shutdown()
@@ -0,0 +1,91 @@
+import asyncio
+
+import pytest
+
+from src.admission import AcceptThrottle, AdaptiveConcurrencyLimit
+from src.metrics_v2 import (
+    ADMISSION_LIMIT,
+    INFERENCE_QUEUE_DEPTH,
+    REJECTED_CONNECTIONS,
+    SHED_REQUESTS,
+    Metrics,
+)
+from src.protocol import PROTOCOL_V2, STATUS_OK, STATUS_OVERLOADED, Protocol
+from tests.conftest import HOST, PORT, DelayMLInterface, build_tcp_server
+
+MS = 1_000_000
+
+
+def test_limit_decreases_on_slow_requests_and_grows_when_saturated():
+    metrics = Metrics()
+    limit = AdaptiveConcurrencyLimit(
+        metrics, target_latency_ms=10, max_limit=64, initial_limit=10
+    )
+
+    # A cohort of slow requests started together only cuts the limit once
+    for _ in range(3):
+        assert limit.try_acquire()
+    for i in range(3):
+        limit.release(started_ns=0, ended_ns=(50 + i) * MS)
+    assert limit.limit == 9
+
+    # Fast requests only raise the limit while it is fully used
+    limit.try_acquire()
+    limit.release(started_ns=100 * MS, ended_ns=101 * MS)
+    assert limit.limit == 9
+    for _ in range(9):
+        assert limit.try_acquire()
+    assert not limit.try_acquire()
+    limit.release(started_ns=100 * MS, ended_ns=101 * MS)
+    assert limit.limit == 9 + 1 / 9
+
+    assert metrics.counters[SHED_REQUESTS] == 1
+    assert metrics.counters[ADMISSION_LIMIT] == 9
+    assert metrics.counters[INFERENCE_QUEUE_DEPTH] == 8
+
+
+def test_accept_throttle_only_applies_near_the_limit():
+    metrics = Metrics()
+    throttle = AcceptThrottle(metrics, threshold=2, rate_per_second=1)
+
+    assert throttle.try_acquire(active_connections=1)
+    assert throttle.try_acquire(active_connections=1)
+    assert throttle.try_acquire(active_connections=2)
+    assert not throttle.try_acquire(active_connections=2)
+    assert metrics.counters[REJECTED_CONNECTIONS] == 1
+
+
+@pytest.mark.asyncio
+async def test_requests_over_the_limit_are_shed_immediately():
+    metrics = Metrics()
+    admission = AdaptiveConcurrencyLimit(
+        metrics, target_latency_ms=1000, max_limit=2, initial_limit=2
+    )
+    server = build_tcp_server(
+        DelayMLInterface(),
+        metrics,
+        protocol_version=PROTOCOL_V2,
+        max_in_flight=8,
+        admission=admission,
+    )
+    await server.startup()
+
+    try:
+        reader, writer = await asyncio.open_connection(HOST, PORT)
+        for request_id in range(6):
+            writer.write(Protocol.pack_frame(request_id, bytes([100]) + b"data"))
+        await writer.drain()
+
+        statuses = {}
+        for _ in range(6):
+            header = Protocol.unpack_header(
+                await reader.readexactly(Protocol.header_size(PROTOCOL_V2))
+            )
+            await reader.readexactly(header.length)
+            statuses[header.request_id] = header.status
+        writer.close()
+    finally:
+        await server.shutdown()
+
+    assert sorted(statuses.values()) == [STATUS_OK] * 2 + [STATUS_OVERLOADED] * 4
+    assert (await metrics.get_metrics())["shed_requests"] == 4
@@ -0,0 +1,71 @@
+import asyncio
+import os
+
+import pytest
+
+from src.batching import BatchScheduler
+from src.config import config
+from src.inference import InferenceExecutor
+from src.metrics_v2 import Metrics
+from src.protocol import Protocol
+from tests.conftest import HOST, PORT, EchoMLInterface, build_tcp_server
+
+
+@pytest.mark.asyncio
+async def test_batched_responses_are_routed_to_their_clients():
+    NUM_CLIENTS = 20
+    REQUESTS_PER_CLIENT = 10
+
+    metrics = Metrics()
+    ml_interface = EchoMLInterface()
+    batcher = BatchScheduler(
+        executor=InferenceExecutor(ml_interface),
+        metrics=metrics,
+        max_batch_size=8,
+        max_wait_us=2000,
+    )
+    server = build_tcp_server(ml_interface, metrics, batcher=batcher)
+    await metrics.start()
+    await server.startup()
+
+    async def client_task():
+        reader, writer = await asyncio.open_connection(HOST, PORT)
+        for _ in range(REQUESTS_PER_CLIENT):
+            payload = os.urandom(16)
+            writer.write(Protocol.pack_message(payload))
+            await writer.drain()
+
+            length_bytes = await reader.readexactly(config.length_field_size)
+            response = await reader.readexactly(Protocol.unpack_length(length_bytes))
+            assert response == payload
+        writer.close()
+
+    try:
+        await asyncio.gather(*(client_task() for _ in range(NUM_CLIENTS)))
+    finally:
+        await server.shutdown()
+        await metrics.stop()
+
+    assert sum(ml_interface.batch_sizes) == NUM_CLIENTS * REQUESTS_PER_CLIENT
+    assert max(ml_interface.batch_sizes) > 1
+    assert max(ml_interface.batch_sizes) <= 8
+
+
+@pytest.mark.asyncio
+async def test_batch_flushes_on_max_wait():
+    metrics = Metrics()
+    ml_interface = EchoMLInterface()
+    batcher = BatchScheduler(
+        executor=InferenceExecutor(ml_interface),
+        metrics=metrics,
+        max_batch_size=64,
+        max_wait_us=1000,
+    )
+    await batcher.start()
+    try:
+        response = await asyncio.wait_for(batcher.submit(b"frame"), timeout=1)
+    finally:
+        await batcher.stop()
+
+    assert response == b"frame"
+    assert ml_interface.batch_sizes == [1]
@@ -0,0 +1,84 @@
+import json
+
+import pytest
+
+from src.broadcaster import MetricsBroadcaster, diff
+
+
+class FakeMetrics:
+    def __init__(self):
+        self.data = {"total_requests": 0, "uptime": 0, "windows": {"1s": 0, "10s": 0}}
+        self.calls = 0
+
+    async def get_metrics(self):
+        self.calls += 1
+        return json.loads(json.dumps(self.data))
+
+
+def test_diff_keeps_only_changed_fields():
+    previous = {"a": 1, "b": {"c": 2, "d": 3}, "e": [1]}
+    current = {"a": 1, "b": {"c": 2, "d": 4}, "e": [1, 2]}
+    assert diff(previous, current) == {"b": {"d": 4}, "e": [1, 2]}
+    assert diff(current, current) == {}
+
+
+@pytest.mark.asyncio
+async def test_snapshot_is_serialized_once_for_all_subscribers():
+    metrics = FakeMetrics()
+    broadcaster = MetricsBroadcaster(metrics, interval_ms=60_000, max_pending=4)
+    subscribers = [broadcaster.subscribe() for _ in range(10)]
+    try:
+        await broadcaster.tick()
+        frames = [subscriber.queue.get_nowait() for subscriber in subscribers]
+    finally:
+        for subscriber in subscribers:
+            broadcaster.unsubscribe(subscriber)
+
+    assert all(frame is frames[0] for frame in frames)
+    assert json.loads(frames[0]) == metrics.data
+    assert broadcaster.task is None
+
+
+@pytest.mark.asyncio
+async def test_delta_subscribers_receive_changed_fields():
+    metrics = FakeMetrics()
+    broadcaster = MetricsBroadcaster(metrics, interval_ms=60_000, max_pending=4)
+    full = broadcaster.subscribe()
+    try:
+        await broadcaster.tick()
+        delta = broadcaster.subscribe(delta=True)
+        metrics.data["total_requests"] = 5
+        metrics.data["windows"]["1s"] = 5
+        await broadcaster.tick()
+    finally:
+        broadcaster.unsubscribe(full)
+        broadcaster.unsubscribe(delta)
+
+    # Joining mid-stream starts from the last full snapshot
+    state = json.loads(delta.queue.get_nowait())
+    update = json.loads(delta.queue.get_nowait())
+    assert update == {"total_requests": 5, "windows": {"1s": 5}}
+
+    state["total_requests"] = update["total_requests"]
+    state["windows"].update(update["windows"])
+    assert state == metrics.data
+    assert full.queue.qsize() == 2
+
+
+@pytest.mark.asyncio
+async def test_slow_subscriber_is_dropped():
+    metrics = FakeMetrics()
+    broadcaster = MetricsBroadcaster(metrics, interval_ms=60_000, max_pending=2)
+    slow = broadcaster.subscribe()
+    fast = broadcaster.subscribe()
+    try:
+        for _ in range(3):
+            await broadcaster.tick()
+            if not fast.queue.empty():
+                fast.queue.get_nowait()
+    finally:
+        broadcaster.unsubscribe(fast)
+
+    assert slow.dropped
+    assert await slow.next_frame() is None
+    assert broadcaster.subscribers == set()
@@ -0,0 +1,111 @@
+import asyncio
+import os
+
+import pytest
+
+from src.config import config
+from src.metrics_v2 import Metrics
+from src.protocol import PROTOCOL_V2, Protocol
+from tests.conftest import (
+    HOST,
+    PORT,
+    DelayMLInterface,
+    EchoMLInterface,
+    build_tcp_server,
+)
+
+
+async def _round_trip(reader, writer, payload: bytes) -> bytes:
+    writer.write(Protocol.pack_message(payload))
+    await writer.drain()
+    length_bytes = await reader.readexactly(config.length_field_size)
+    return await reader.readexactly(Protocol.unpack_length(length_bytes))
+
+
+@pytest.mark.asyncio
+async def test_sequential_requests_over_buffered_transport():
+    server = build_tcp_server(EchoMLInterface(), Metrics(), transport="buffered")
+    await server.startup()
+    try:
+        reader, writer = await asyncio.open_connection(HOST, PORT)
+        # Sizes straddle the initial buffer so it has to compact and grow
+        for size in [1, 128, 60 * 1024, 200 * 1024, 5]:
+            payload = os.urandom(size)
+            assert await _round_trip(reader, writer, payload) == payload
+        writer.close()
+    finally:
+        await server.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_fragmented_frames_are_reassembled():
+    server = build_tcp_server(EchoMLInterface(), Metrics(), transport="buffered")
+    await server.startup()
+    try:
+        reader, writer = await asyncio.open_connection(HOST, PORT)
+        payload = os.urandom(1000)
+        frame = Protocol.pack_message(payload)
+        for i in range(0, len(frame), 7):
+            writer.write(frame[i : i + 7])
+            await writer.drain()
+            await asyncio.sleep(0)
+
+        length_bytes = await reader.readexactly(config.length_field_size)
+        response = await reader.readexactly(Protocol.unpack_length(length_bytes))
+        writer.close()
+    finally:
+        await server.shutdown()
+
+    assert response == payload
+
+
+@pytest.mark.asyncio
+async def test_pipelined_v2_over_buffered_transport():
+    ml_interface = DelayMLInterface()
+    server = build_tcp_server(
+        ml_interface,
+        Metrics(),
+        transport="buffered",
+        protocol_version=PROTOCOL_V2,
+        max_in_flight=3,
+    )
+    await server.startup()
+
+    delays = [40, 30, 20, 10, 1, 1]
+    try:
+        reader, writer = await asyncio.open_connection(HOST, PORT)
+        writer.writelines(
+            Protocol.pack_frame(request_id, bytes([delay]) * 10)
+            for request_id, delay in enumerate(delays)
+        )
+        await writer.drain()
+
+        responses = {}
+        for _ in delays:
+            header = Protocol.unpack_header(
+                await reader.readexactly(Protocol.header_size(PROTOCOL_V2))
+            )
+            responses[header.request_id] = await reader.readexactly(header.length)
+        writer.close()
+    finally:
+        await server.shutdown()
+
+    assert responses == {i: bytes([delay]) * 10 for i, delay in enumerate(delays)}
+    assert ml_interface.max_in_flight == 3
+
+
+@pytest.mark.asyncio
+async def test_oversized_payload_closes_connection():
+    server = build_tcp_server(EchoMLInterface(), Metrics(), transport="buffered")
+    server.max_payload_size = 16
+    await server.startup()
+    try:
+        reader, writer = await asyncio.open_connection(HOST, PORT)
+        writer.write(Protocol.pack_message(os.urandom(17)))
+        await writer.drain()
+        assert await asyncio.wait_for(reader.read(), timeout=2) == b""
+        writer.close()
+    finally:
+        await server.shutdown()
+
+    assert not server.active_connections
@@ -0,0 +1,78 @@
+import asyncio
+
+import pytest
+
+from src import cache as cache_module
+from src.cache import ENTRY_OVERHEAD, InferenceCache, payload_key
+from src.config import config
+from src.metrics_v2 import CACHE_EVICTIONS, CACHE_HITS, CACHE_MISSES, Metrics
+from src.protocol import Protocol
+from tests.conftest import HOST, PORT, CountingMLInterface, build_tcp_server
+
+
+def _entry_size(response: bytes) -> int:
+    return len(response) + 16 + ENTRY_OVERHEAD
+
+
+def test_lru_eviction_keeps_within_budget():
+    metrics = Metrics()
+    cache = InferenceCache(_entry_size(b"x" * 10) * 2, ttl_seconds=60, metrics=metrics)
+    a, b, c = (payload_key(p) for p in (b"a", b"b", b"c"))
+
+    cache.put(a, b"x" * 10)
+    cache.put(b, b"y" * 10)
+    assert cache.get(a) == b"x" * 10  # a is now most recently used
+    cache.put(c, b"z" * 10)
+
+    assert cache.get(b) is None
+    assert cache.get(a) == b"x" * 10
+    assert cache.get(c) == b"z" * 10
+    assert cache.size <= cache.max_bytes
+    assert metrics.counters[CACHE_HITS] == 3
+    assert metrics.counters[CACHE_MISSES] == 1
+    assert metrics.counters[CACHE_EVICTIONS] == 1
+
+    # Larger than the whole budget: not stored, nothing evicted
+    cache.put(b, b"w" * cache.max_bytes)
+    assert len(cache.entries) == 2
+
+
+def test_entries_expire(monkeypatch):
+    now = 1000.0
+    monkeypatch.setattr(cache_module.time, "monotonic", lambda: now)
+    cache = InferenceCache(10_000, ttl_seconds=5, metrics=Metrics())
+    key = payload_key(b"payload")
+
+    cache.put(key, b"response")
+    now += 4
+    assert cache.get(key) == b"response"
+    now += 1
+    assert cache.get(key) is None
+    assert cache.size == 0
+
+
+@pytest.mark.asyncio
+async def test_repeated_payloads_are_served_from_cache():
+    metrics = Metrics()
+    ml_interface = CountingMLInterface()
+    cache = InferenceCache(10_000, ttl_seconds=60, metrics=metrics)
+    server = build_tcp_server(ml_interface, metrics, cache=cache)
+    await server.startup()
+
+    try:
+        reader, writer = await asyncio.open_connection(HOST, PORT)
+        for payload in [b"frame-1", b"frame-2", b"frame-1", b"frame-1"]:
+            writer.write(Protocol.pack_message(payload))
+            await writer.drain()
+            length_bytes = await reader.readexactly(config.length_field_size)
+            response = await reader.readexactly(Protocol.unpack_length(length_bytes))
+            assert response == payload[::-1]
+        writer.close()
+        data = await metrics.get_metrics()
+    finally:
+        await server.shutdown()
+
+    assert ml_interface.calls == 2
+    assert data["cache_hits"] == 2
+    assert data["cache_misses"] == 2
+    assert data["total_requests"] == 4
@@ -0,0 +1,54 @@
+import multiprocessing
+
+import pytest
+
+from src.cluster import ClusterMetrics, ClusterState, GlobalConnectionLimiter
+from src.metrics_v2 import Metrics
+
+
+@pytest.fixture
+def state():
+    return ClusterState(2, max_connections=3, ctx=multiprocessing.get_context("spawn"))
+
+
+def test_connection_limit_is_global(state):
+    first = GlobalConnectionLimiter(state, 0)
+    second = GlobalConnectionLimiter(state, 1)
+
+    assert first.try_acquire()
+    assert first.try_acquire()
+    assert second.try_acquire()
+    assert not second.try_acquire()
+    assert not first.try_acquire()
+
+    first.release()
+    assert second.try_acquire()
+
+
+@pytest.mark.asyncio
+async def test_cluster_metrics_survive_worker_restart(state):
+    cluster_metrics = ClusterMetrics(state)
+    first = Metrics(counters=state.worker_counters(0))
+    second = Metrics(counters=state.worker_counters(1))
+
+    first.add_connection()
+    for _ in range(10):
+        first.add_request()
+    first.add_error()
+    for _ in range(5):
+        second.add_request()
+
+    data = await cluster_metrics.get_metrics()
+    assert data["total_requests"] == 15
+    assert data["connections"] == 1
+    assert [w["total_requests"] for w in data["workers"]] == [10, 5]
+    assert set(data["windows"]) == {"1s", "10s", "60s", "300s"}
+    assert (await first.get_metrics())["total_requests"] == 10
+
+    # Worker 0 crashes: its counters are kept, its connections are released
+    cluster_metrics.retire(0)
+    data = await cluster_metrics.get_metrics()
+    assert data["total_requests"] == 15
+    assert data["errors"] == 1
+    assert data["connections"] == 0
+    assert data["workers"][0]["total_requests"] == 0
@@ -0,0 +1,80 @@
+import asyncio
+
+import pytest
+
+from src.coalescing import RequestCoalescer
+from src.config import config
+from src.inference import InferenceExecutor
+from src.metrics_v2 import Metrics
+from src.protocol import Protocol
+from tests.conftest import HOST, PORT, BlockingMLInterface, build_tcp_server
+
+
+class CountingBlockingMLInterface(BlockingMLInterface):
+    def __init__(self, delay: float):
+        super().__init__(delay)
+        self.calls = 0
+
+    def run_inference(self, payload: bytes) -> bytes:
+        self.calls += 1
+        return super().run_inference(payload)
+
+
+@pytest.mark.asyncio
+async def test_identical_in_flight_requests_share_one_inference():
+    NUM_CLIENTS = 10
+
+    metrics = Metrics()
+    ml_interface = CountingBlockingMLInterface(delay=0.1)
+    server = build_tcp_server(
+        ml_interface,
+        metrics,
+        executor=InferenceExecutor(ml_interface, mode="thread", workers=4),
+        coalescer=RequestCoalescer(metrics),
+    )
+    await server.startup()
+
+    async def client_task(payload: bytes):
+        reader, writer = await asyncio.open_connection(HOST, PORT)
+        writer.write(Protocol.pack_message(payload))
+        await writer.drain()
+        length_bytes = await reader.readexactly(config.length_field_size)
+        response = await reader.readexactly(Protocol.unpack_length(length_bytes))
+        writer.close()
+        return response
+
+    try:
+        responses = await asyncio.gather(
+            *(client_task(b"same-frame") for _ in range(NUM_CLIENTS)),
+            client_task(b"other-frame"),
+        )
+        data = await metrics.get_metrics()
+    finally:
+        await server.shutdown()
+
+    assert responses == [b"emarf-emas"] * NUM_CLIENTS + [b"emarf-rehto"]
+    assert ml_interface.calls == 2
+    assert data["coalesced_requests"] == NUM_CLIENTS - 1
+    assert data["coalescing_ratio"] == (NUM_CLIENTS - 1) / (NUM_CLIENTS + 1)
+
+
+@pytest.mark.asyncio
+async def test_failure_and_cancellation_do_not_leak():
+    coalescer = RequestCoalescer(Metrics())
+    started = asyncio.Event()
+
+    async def failing():
+        started.set()
+        await asyncio.sleep(0.01)
+        raise ValueError("model failed")
+
+    first = asyncio.ensure_future(coalescer.run(b"key", failing))
+    await started.wait()
+    second = asyncio.ensure_future(coalescer.run(b"key", failing))
+    await asyncio.sleep(0)
+    first.cancel()
+
+    # The remaining caller still gets the shared outcome
+    with pytest.raises(ValueError):
+        await second
+    assert coalescer.in_flight == {}
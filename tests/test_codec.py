@@ -0,0 +1,75 @@
+import os
+
+import pytest
+
+from src.protocol import PROTOCOL_V2, FrameCodec, FrameParser, Protocol
+
+
+@pytest.mark.parametrize("length_field_size", [2, 4, 8])
+def test_codec_is_bound_to_its_length_size(length_field_size):
+    codec = FrameCodec(length_field_size)
+    message = codec.pack_message(b"payload")
+
+    assert codec.header_size() == length_field_size
+    assert len(message) == length_field_size + 7
+    assert codec.unpack_length(message[:length_field_size]) == 7
+
+    header = codec.unpack_header(codec.pack_frame_header(9, 3, flags=1, status=2))
+    assert header == (PROTOCOL_V2, 1, 2, 0, 9, 3)
+
+
+def test_unsupported_length_size():
+    with pytest.raises(ValueError):
+        FrameCodec(3)
+
+
+def test_pack_into_and_pack_many_match_pack_message():
+    codec = FrameCodec(4)
+    payloads = [b"a", b"", os.urandom(300)]
+    expected = b"".join(codec.pack_message(p) for p in payloads)
+
+    assert codec.pack_many(payloads) == expected
+
+    buffer = bytearray(len(expected) + 2)
+    offset = 2
+    for payload in payloads:
+        offset = codec.pack_into(buffer, offset, payload)
+    assert offset == len(buffer)
+    assert buffer[2:] == expected
+
+
+def test_protocol_class_delegates_to_codec():
+    codec = FrameCodec(Protocol.header_size())
+    assert Protocol.pack_message(b"abc") == codec.pack_message(b"abc")
+    assert Protocol.pack_frame(1, b"abc") == codec.pack_frame(1, b"abc")
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 64, 10_000])
+def test_parser_yields_frames_across_chunk_boundaries(chunk_size):
+    codec = FrameCodec(2)
+    payloads = [os.urandom(n) for n in (5, 0, 17, 300, 1)]
+    stream = codec.pack_many(payloads)
+    parser = FrameParser(codec)
+
+    received = []
+    for i in range(0, len(stream), chunk_size):
+        for frame in parser.feed(stream[i : i + chunk_size]):
+            assert isinstance(frame, memoryview)
+            received.append(bytes(frame))
+
+    assert received == payloads
+    assert parser.pending() == 0
+
+
+def test_parser_version_2_frames_and_held_views():
+    codec = FrameCodec(4)
+    parser = FrameParser(codec, version=PROTOCOL_V2)
+    stream = codec.pack_frame(1, b"first") + codec.pack_frame(2, b"second")
+
+    [(header, first)] = parser.feed(stream[:20])
+    assert header.request_id == 1
+
+    # Views from an earlier feed survive later feeds
+    [(header, second)] = parser.feed(stream[20:])
+    assert header.request_id == 2
+    assert (bytes(first), bytes(second)) == (b"first", b"second")
@@ -0,0 +1,122 @@
+import asyncio
+import zlib
+
+import pytest
+import pytest_asyncio
+
+from src.compression import PayloadCompression, PayloadTooLarge, ZlibCodec
+from src.metrics_v2 import Metrics
+from src.protocol import (
+    FLAG_ACCEPT_COMPRESSED,
+    FLAG_COMPRESSED,
+    PROTOCOL_V2,
+    STATUS_BAD_FRAME,
+    STATUS_OK,
+    Protocol,
+)
+from tests.conftest import HOST, PORT, CountingMLInterface, build_tcp_server
+
+ZLIB = ZlibCodec.codec_id
+
+
+async def exchange(frame: bytes):
+    reader, writer = await asyncio.open_connection(HOST, PORT)
+    writer.write(frame)
+    await writer.drain()
+    header = Protocol.unpack_header(
+        await reader.readexactly(Protocol.header_size(PROTOCOL_V2))
+    )
+    payload = await reader.readexactly(header.length)
+    writer.close()
+    return header, payload
+
+
+@pytest_asyncio.fixture
+async def compressing_server():
+    metrics = Metrics()
+    server = build_tcp_server(
+        CountingMLInterface(),
+        metrics,
+        protocol_version=PROTOCOL_V2,
+        compression=PayloadCompression(
+            metrics, max_payload_size=64 * 1024, min_size=256
+        ),
+    )
+    await server.startup()
+    yield server
+    await server.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_compressed_request_and_response(compressing_server):
+    payload = b"feature-tensor " * 1000
+    header, response = await exchange(
+        Protocol.pack_frame(
+            7,
+            zlib.compress(payload),
+            flags=FLAG_COMPRESSED | FLAG_ACCEPT_COMPRESSED,
+            codec=ZLIB,
+        )
+    )
+
+    assert header.status == STATUS_OK
+    assert header.request_id == 7
+    assert header.flags == FLAG_COMPRESSED
+    assert header.codec == ZLIB
+    assert zlib.decompress(response) == payload[::-1]
+
+    data = await compressing_server.metrics.get_metrics()
+    assert data["compression_raw_bytes"] == 2 * len(payload)
+    assert data["compression_ratio"] > 10
+    assert data["compression_cpu_ns"] > 0
+
+
+@pytest.mark.asyncio
+async def test_small_and_unrequested_responses_are_not_compressed(compressing_server):
+    header, response = await exchange(
+        Protocol.pack_frame(1, b"small", flags=FLAG_ACCEPT_COMPRESSED, codec=ZLIB)
+    )
+    assert (header.flags, header.codec, response) == (0, 0, b"llams")
+
+    payload = b"a" * 1000
+    header, response = await exchange(Protocol.pack_frame(2, payload))
+    assert (header.flags, response) == (0, payload)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "payload, codec",
+    [
+        # Decompresses to more than max_payload_size
+        (zlib.compress(b"\0" * (1024 * 1024)), ZLIB),
+        (b"not zlib data", ZLIB),
+        (zlib.compress(b"data")[:-3], ZLIB),
+        (zlib.compress(b"data"), 99),
+    ],
+)
+async def test_undecodable_payload_is_rejected(compressing_server, payload, codec):
+    header, response = await exchange(
+        Protocol.pack_frame(3, payload, flags=FLAG_COMPRESSED, codec=codec)
+    )
+
+    assert header.status == STATUS_BAD_FRAME
+    assert response == b""
+    assert compressing_server.ml_interface.calls == 0
+
+
+def test_decompression_stops_at_max_size():
+    codec = ZlibCodec()
+    bomb = zlib.compress(b"\0" * (100 * 1024 * 1024))
+
+    produced = 0
+    with pytest.raises(PayloadTooLarge):
+        for chunk in codec.decompress_chunks(bomb, 1024 * 1024):
+            produced += len(chunk)
+    assert produced <= 1024 * 1024
+
+
+def test_decompression_reuses_buffers():
+    compression = PayloadCompression(Metrics(), max_payload_size=1024, min_size=1)
+    for payload in (b"first" * 100, b"second"):
+        assert compression.decompress(ZLIB, zlib.compress(payload)) == payload
+    assert len(compression.buffers) == 1
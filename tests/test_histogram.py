@@ -0,0 +1,66 @@
+import asyncio
+import random
+
+import pytest
+
+from src.config import config
+from src.histogram import LatencyHistogram, RollingLatencyHistogram
+from src.metrics_v2 import STAGES, Metrics
+from src.protocol import Protocol
+from tests.conftest import HOST, PORT, EchoMLInterface, build_tcp_server
+
+
+def test_percentiles_within_relative_error():
+    histogram = LatencyHistogram(sub_bucket_bits=5)
+    values = [random.randint(1, 10_000_000) for _ in range(10_000)]
+    for value in values:
+        histogram.record(value)
+
+    values.sort()
+    for pct in (50, 90, 99, 99.9):
+        exact = values[round(len(values) * pct / 100) - 1]
+        assert abs(histogram.percentile(pct) - exact) <= exact / 2**5
+    assert histogram.percentile(100) == histogram.max == values[-1]
+
+
+def test_small_values_are_exact():
+    histogram = LatencyHistogram()
+    for value in range(64):
+        histogram.record(value)
+    assert histogram.percentile(50) == 31
+    assert histogram.max == 63
+
+
+def test_rolling_window_forgets_old_slices():
+    second = 1_000_000_000
+    rolling = RollingLatencyHistogram(window_ns=10 * second, slices=5)
+    rolling.record(1000, now_ns=0)
+    rolling.record(5000, now_ns=3 * second)
+
+    assert rolling.snapshot(now_ns=4 * second).total == 2
+    assert rolling.snapshot(now_ns=11 * second).total == 1
+    assert rolling.snapshot(now_ns=30 * second).total == 0
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("transport", ["stream", "buffered"])
+async def test_server_records_every_stage(transport):
+    metrics = Metrics()
+    server = build_tcp_server(EchoMLInterface(), metrics, transport=transport)
+    await server.startup()
+    try:
+        reader, writer = await asyncio.open_connection(HOST, PORT)
+        for _ in range(5):
+            writer.write(Protocol.pack_message(b"payload"))
+            await writer.drain()
+            length_bytes = await reader.readexactly(config.length_field_size)
+            await reader.readexactly(Protocol.unpack_length(length_bytes))
+        writer.close()
+    finally:
+        await server.shutdown()
+
+    latency = (await metrics.get_metrics())["stage_latency_us"]
+    assert set(latency) == set(STAGES)
+    for stage in STAGES:
+        assert latency[stage]["count"] >= 5
+        assert latency[stage]["p50"] <= latency[stage]["max"]
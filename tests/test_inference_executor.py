@@ -0,0 +1,63 @@
+import asyncio
+import time
+
+import pytest
+
+from src.inference import InferenceExecutor
+from tests.conftest import BlockingMLInterface, EchoMLInterface
+
+
+async def _max_loop_lag(duration: float) -> float:
+    """Largest overshoot of a 10ms sleep while `duration` elapses"""
+    worst = 0.0
+    loop = asyncio.get_running_loop()
+    end = loop.time() + duration
+    while loop.time() < end:
+        started = time.perf_counter()
+        await asyncio.sleep(0.01)
+        worst = max(worst, time.perf_counter() - started - 0.01)
+    return worst
+
+
+def test_native_async_detection():
+    assert EchoMLInterface().has_native_async()
+    assert not BlockingMLInterface().has_native_async()
+
+
+@pytest.mark.asyncio
+async def test_thread_mode_keeps_loop_responsive():
+    executor = InferenceExecutor(
+        BlockingMLInterface(delay=0.2), mode="thread", workers=2
+    )
+    executor.start()
+    try:
+        results, lag = await asyncio.gather(
+            asyncio.gather(executor.run(b"abc"), executor.run(b"xyz")),
+            _max_loop_lag(0.3),
+        )
+    finally:
+        executor.shutdown()
+
+    assert results == [b"cba", b"zyx"]
+    assert lag < 0.1
+
+
+@pytest.mark.asyncio
+async def test_process_mode_runs_inference_in_workers():
+    executor = InferenceExecutor(
+        BlockingMLInterface(delay=0), mode="process", workers=2
+    )
+    executor.start()
+    try:
+        single = await executor.run(b"abc")
+        batch = await executor.run_batch([b"12", b"34"])
+    finally:
+        executor.shutdown()
+
+    assert single == b"cba"
+    assert batch == [b"21", b"43"]
+
+
+def test_invalid_mode_is_rejected():
+    with pytest.raises(ValueError):
+        InferenceExecutor(EchoMLInterface(), mode="gpu")
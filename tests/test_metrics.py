@@ -0,0 +1,43 @@
+import asyncio
+
+import pytest
+
+from src.metrics_v2 import Metrics, QueuedMetrics
+
+
+def _record(metrics: Metrics, requests: int):
+    metrics.add_connection()
+    for _ in range(requests):
+        metrics.add_request()
+    metrics.add_error()
+    metrics.add_inference_error()
+    metrics.remove_connection()
+
+
+@pytest.mark.asyncio
+async def test_counters_are_exact_under_burst():
+    metrics = Metrics()
+    _record(metrics, 50_000)
+    data = await metrics.get_metrics()
+
+    assert data["total_requests"] == 50_000
+    assert data["errors"] == 1
+    assert data["inference_errors"] == 1
+    assert data["connections"] == 0
+    assert data["error_rate"] == 1 / 50_000
+
+
+@pytest.mark.asyncio
+async def test_queued_backend_matches_counters():
+    metrics = QueuedMetrics(batch_size=10, flush_interval=0.01)
+    await metrics.start()
+    try:
+        _record(metrics, 100)
+        await asyncio.sleep(0.1)
+        data = await metrics.get_metrics()
+    finally:
+        await metrics.stop()
+
+    assert data["total_requests"] == 100
+    assert data["errors"] == 1
+    assert data["queue_overload"] is False
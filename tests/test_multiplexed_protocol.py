@@ -0,0 +1,82 @@
+import asyncio
+
+import pytest
+
+from src.metrics_v2 import Metrics
+from src.protocol import PROTOCOL_V2, STATUS_OK, Protocol
+from tests.conftest import HOST, PORT, DelayMLInterface, build_tcp_server
+
+
+async def _read_response(reader: asyncio.StreamReader):
+    header = Protocol.unpack_header(
+        await reader.readexactly(Protocol.header_size(PROTOCOL_V2))
+    )
+    return header, await reader.readexactly(header.length)
+
+
+@pytest.mark.asyncio
+async def test_pipelined_requests_complete_out_of_order():
+    ml_interface = DelayMLInterface()
+    server = build_tcp_server(
+        ml_interface, Metrics(), protocol_version=PROTOCOL_V2, max_in_flight=4
+    )
+    await server.startup()
+
+    # Earlier requests sleep longer, so they finish last
+    delays = [80, 60, 40, 20, 5, 5, 5, 5]
+    try:
+        reader, writer = await asyncio.open_connection(HOST, PORT)
+        for request_id, delay in enumerate(delays):
+            writer.write(Protocol.pack_frame(request_id, bytes([delay]) + b"data"))
+        await writer.drain()
+
+        responses = [await _read_response(reader) for _ in delays]
+        writer.close()
+    finally:
+        await server.shutdown()
+
+    order = [header.request_id for header, _ in responses]
+    assert sorted(order) == list(range(len(delays)))
+    assert order != sorted(order)
+    for header, payload in responses:
+        assert header.status == STATUS_OK
+        assert payload == bytes([delays[header.request_id]]) + b"data"
+    assert ml_interface.max_in_flight == 4
+
+
+@pytest.mark.asyncio
+async def test_in_flight_requests_are_answered_after_client_eof():
+    server = build_tcp_server(
+        DelayMLInterface(), Metrics(), protocol_version=PROTOCOL_V2
+    )
+    await server.startup()
+    try:
+        reader, writer = await asyncio.open_connection(HOST, PORT)
+        writer.write(Protocol.pack_frame(7, bytes([20])))
+        await writer.drain()
+        writer.write_eof()
+
+        header, payload = await asyncio.wait_for(_read_response(reader), timeout=2)
+        writer.close()
+    finally:
+        await server.shutdown()
+
+    assert header.request_id == 7
+    assert payload == bytes([20])
+
+
+def test_v2_header_round_trip():
+    frame = Protocol.pack_frame(42, b"abc", flags=3, status=1)
+    header = Protocol.unpack_header(frame[: Protocol.header_size(PROTOCOL_V2)])
+
+    assert header.request_id == 42
+    assert header.flags == 3
+    assert header.status == 1
+    assert header.length == 3
+
+
+def test_v2_header_rejects_unknown_version():
+    frame = bytearray(Protocol.pack_frame(1, b"abc"))
+    frame[0] = 9
+    with pytest.raises(ValueError):
+        Protocol.unpack_header(bytes(frame[: Protocol.header_size(PROTOCOL_V2)]))
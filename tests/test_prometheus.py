@@ -0,0 +1,62 @@
+import multiprocessing
+import time
+
+import pytest
+
+from src.cluster import ClusterMetrics, ClusterState
+from src.metrics_v2 import STAGE_INFERENCE, Metrics
+from src.prometheus import PrometheusExporter, render_openmetrics
+
+
+@pytest.mark.asyncio
+async def test_render_counters_histograms_and_quantiles():
+    metrics = Metrics()
+    metrics.add_connection()
+    for _ in range(3):
+        metrics.add_request()
+    metrics.add_batch(3, [5, 20, 2000])
+    now = time.perf_counter_ns()
+    metrics.record_stage(STAGE_INFERENCE, now - 1_000_000, now)
+
+    lines = render_openmetrics(await metrics.get_metrics()).splitlines()
+
+    assert lines[-1] == "# EOF"
+    assert "# TYPE ml_server_requests counter" in lines
+    assert "ml_server_requests_total 3" in lines
+    assert "ml_server_connections 1" in lines
+    assert 'ml_server_inference_batch_size_bucket{le="2.0"} 0' in lines
+    assert 'ml_server_inference_batch_size_bucket{le="4.0"} 1' in lines
+    assert 'ml_server_inference_queue_wait_seconds_bucket{le="1e-05"} 1' in lines
+    assert 'ml_server_inference_queue_wait_seconds_bucket{le="+Inf"} 3' in lines
+    assert "ml_server_inference_queue_wait_seconds_count 3" in lines
+    p50 = next(
+        line
+        for line in lines
+        if line.startswith('ml_server_stage_latency_seconds{stage="inference"')
+    )
+    assert 'quantile="0.5"' in p50
+    assert abs(float(p50.split()[-1]) - 0.001) < 0.001 / 16
+
+
+@pytest.mark.asyncio
+async def test_cluster_samples_are_labelled_per_worker():
+    state = ClusterState(2, max_connections=4, ctx=multiprocessing.get_context("spawn"))
+    Metrics(counters=state.worker_counters(1)).add_request()
+
+    text = render_openmetrics(await ClusterMetrics(state).get_metrics())
+
+    assert 'ml_server_requests_total{worker="0"} 0' in text
+    assert 'ml_server_requests_total{worker="1"} 1' in text
+
+
+@pytest.mark.asyncio
+async def test_exporter_caches_rendered_text():
+    metrics = Metrics()
+    exporter = PrometheusExporter(metrics, cache_seconds=60)
+
+    first = await exporter.render()
+    metrics.add_request()
+    assert await exporter.render() is first
+
+    exporter.cache_seconds = 0
+    assert "ml_server_requests_total 1" in await exporter.render()
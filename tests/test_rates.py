@@ -0,0 +1,65 @@
+import pytest
+
+from src import rates
+from src.metrics_v2 import Metrics
+from src.rates import WindowedCounter
+
+
+class FakeClock:
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(rates.time, "monotonic", clock)
+    return clock
+
+
+def test_windowed_counter_expires_old_seconds(clock):
+    counter = WindowedCounter(
+        memoryview(bytearray(8 * WindowedCounter.slots_needed(10))).cast("q"), 10
+    )
+    for second in range(5):
+        for _ in range(second + 1):
+            counter.add()
+        clock.now += 1
+
+    now = int(clock.now)
+    assert counter.count(1, now) == 5
+    assert counter.count(10, now) == 1 + 2 + 3 + 4 + 5
+
+    # Past the horizon every bucket is stale, even without new events
+    assert counter.count(10, now + 20) == 0
+
+    # A new event after a long gap clears the skipped buckets
+    clock.now += 20
+    counter.add()
+    clock.now += 1
+    assert counter.count(10, int(clock.now)) == 1
+
+
+@pytest.mark.asyncio
+async def test_metrics_report_windowed_rates(clock):
+    metrics = Metrics()
+    for _ in range(100):
+        metrics.add_request()
+    clock.now += 30
+    for _ in range(10):
+        metrics.add_request()
+    metrics.add_error()
+    clock.now += 1
+
+    data = await metrics.get_metrics()
+    windows = data["windows"]
+
+    assert data["total_requests"] == 110
+    assert windows["1s"]["requests_per_second"] == 10
+    assert windows["1s"]["error_rate"] == 0.1
+    assert windows["10s"]["requests_per_second"] == 1
+    assert windows["60s"]["requests_per_second"] == 110 / 60
+    assert windows["60s"]["errors_per_second"] == 1 / 60
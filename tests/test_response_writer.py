@@ -0,0 +1,70 @@
+import asyncio
+
+import pytest
+
+from src.response_writer import ResponseWriter
+
+
+class FakeTransport:
+    def __init__(self):
+        self.buffered = 0
+        self.closing = False
+
+    def set_write_buffer_limits(self, high=None, low=None):
+        self.high = high
+
+    def get_write_buffer_size(self) -> int:
+        return self.buffered
+
+    def is_closing(self) -> bool:
+        return self.closing
+
+
+class FakeWriter:
+    def __init__(self):
+        self.transport = FakeTransport()
+        self.sends: list[list[bytes]] = []
+        self.drains = 0
+
+    def writelines(self, parts):
+        self.sends.append(list(parts))
+        self.transport.buffered += sum(len(part) for part in parts)
+
+    async def drain(self):
+        self.drains += 1
+        self.transport.buffered = 0
+
+
+@pytest.mark.asyncio
+async def test_responses_ready_together_are_sent_once():
+    writer = FakeWriter()
+    responses = ResponseWriter(writer, high_water=1024, coalesce=True)
+
+    for i in range(3):
+        responses.send(b"hdr", bytes([i]))
+        await responses.drain()
+    assert writer.sends == []
+
+    await asyncio.sleep(0)
+    assert writer.sends == [[b"hdr", b"\x00", b"hdr", b"\x01", b"hdr", b"\x02"]]
+    assert writer.drains == 0
+
+
+@pytest.mark.asyncio
+async def test_drain_waits_only_above_high_water():
+    writer = FakeWriter()
+    responses = ResponseWriter(writer, high_water=8)
+    assert writer.transport.high == 8
+
+    responses.send(b"hdr", b"12345")
+    await responses.drain()
+    assert writer.drains == 0
+
+    responses.send(b"hdr", b"12345")
+    await responses.drain()
+    assert writer.drains == 1
+    assert len(writer.sends) == 2
+
+    writer.transport.closing = True
+    with pytest.raises(ConnectionResetError):
+        await responses.drain()